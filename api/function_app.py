@@ -1,12 +1,44 @@
+import gzip
+import heapq
 import json
 import logging
+import math
 import os
+import sqlite3
+import statistics
+import tempfile
+import threading
 import time
-from typing import Any, Dict, List, Optional, Tuple
-from datetime import datetime, timedelta
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
+from contextlib import closing
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from datetime import datetime
+from functools import lru_cache
+from types import SimpleNamespace
 
 import azure.functions as func
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+
+    def _json_dumps(obj: Any, pretty: bool = False) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+except ImportError:  # stdlib fallback keeps local dev working without orjson
+    _json_loads = json.loads
+
+    def _json_dumps(obj: Any, pretty: bool = False) -> bytes:
+        if pretty:
+            return json.dumps(obj, indent=2).encode("utf-8")
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
 
 app = func.FunctionApp(http_auth_level=func.AuthLevel.ANONYMOUS)
 
@@ -14,13 +46,37 @@ app = func.FunctionApp(http_auth_level=func.AuthLevel.ANONYMOUS)
 ACS_YEAR = "2023"
 ACS_BASE = f"https://api.census.gov/data/{ACS_YEAR}/acs/acs5"
 
-RAPIDAPI_KEY = os.environ.get("RAPIDAPI_KEY", "")
-RAPIDAPI_HOST = os.environ.get("RAPIDAPI_HOST", "realty-in-us.p.rapidapi.com")
-RAPIDAPI_TEST_URL = os.environ.get(
-    "RAPIDAPI_TEST_URL",
-    "https://realty-in-us.p.rapidapi.com/properties/v3/list"
+class Config(NamedTuple):
+    """Environment-derived settings, resolved and coerced once at import"""
+    rapidapi_key: str
+    rapidapi_host: str
+    rapidapi_list_url: str
+    rapidapi_autocomplete_url: str
+    price_min: int
+    price_max: int
+    disk_cache_path: str  # "" disables the on-disk cache
+    debug_breakdown: bool  # print the per-request neighborhood grouping breakdown to stdout
+
+    @property
+    def rapidapi_configured(self) -> bool:
+        return bool(self.rapidapi_key and self.rapidapi_host and self.rapidapi_list_url)
+
+CFG = Config(
+    rapidapi_key=os.environ.get("RAPIDAPI_KEY", ""),
+    rapidapi_host=os.environ.get("RAPIDAPI_HOST", "realty-in-us.p.rapidapi.com"),
+    rapidapi_list_url=os.environ.get(
+        "RAPIDAPI_TEST_URL",
+        "https://realty-in-us.p.rapidapi.com/properties/v3/list"
+    ),
+    rapidapi_autocomplete_url="https://realty-in-us.p.rapidapi.com/locations/v2/auto-complete",
+    price_min=int(os.environ.get("PRICE_MIN", "150000")),
+    price_max=int(os.environ.get("PRICE_MAX", "250000")),
+    disk_cache_path=os.environ.get(
+        "DISK_CACHE_PATH",
+        os.path.join(tempfile.gettempdir(), "house-flip-cache.sqlite3")
+    ),
+    debug_breakdown=os.environ.get("DEBUG_BREAKDOWN", "").strip().lower() in ("1", "true", "yes", "on"),
 )
-RAPIDAPI_AUTOCOMPLETE_URL = "https://realty-in-us.p.rapidapi.com/locations/v2/auto-complete"
 
 # School ratings by neighborhood/city (1-10 scale)
 # Based on district performance, test scores, and school quality metrics
@@ -246,6 +302,27 @@ NEIGHBORHOOD_SCHOOL_RATINGS = {
     "Shelby County — Outlying": 6.0,
 }
 
+# Secondary indexes over NEIGHBORHOOD_SCHOOL_RATINGS, built once at import:
+# best-rated first (ties keep table order), and each neighborhood's percentile
+# (share of rated neighborhoods at or below its rating).
+SCHOOL_RATINGS_BY_RANK: Tuple[Tuple[str, float], ...] = tuple(
+    sorted(NEIGHBORHOOD_SCHOOL_RATINGS.items(), key=lambda kv: -kv[1])
+)
+_ascending_ratings = sorted(NEIGHBORHOOD_SCHOOL_RATINGS.values())
+_SCHOOL_RATING_PERCENTILES: Dict[str, float] = {
+    name: round(100.0 * bisect_right(_ascending_ratings, rating) / len(_ascending_ratings), 1)
+    for name, rating in NEIGHBORHOOD_SCHOOL_RATINGS.items()
+}
+del _ascending_ratings
+
+def top_school_neighborhoods(k: int) -> Tuple[Tuple[str, float], ...]:
+    """The k best-rated neighborhoods as (name, rating) pairs"""
+    return SCHOOL_RATINGS_BY_RANK[:max(0, k)]
+
+def school_rating_percentile(neighborhood: str) -> Optional[float]:
+    """Percentile (0-100) of a neighborhood's school rating, or None if unrated"""
+    return _SCHOOL_RATING_PERCENTILES.get(neighborhood)
+
 # Recent Starbucks openings in Central Indiana (2024-2025)
 # Used as a positive indicator for neighborhood growth and retail investment
 STARBUCKS_RECENT_OPENINGS = {
@@ -265,265 +342,23 @@ STARBUCKS_RECENT_OPENINGS = {
 }
 
 # Google Maps neighborhood mapping (generated 2025-11-13)
-# Official neighborhood names from Google Maps Geocoding API
-GOOGLE_MAPS_NEIGHBORHOODS = {
-    "310104": "Park 100",
-    "310105": "Park 100",
-    "310106": "Westchester Estates",
-    "310108": "Eagle Creek",
-    "310110": "Eagle Creek",
-    "310111": "Eagle Creek",
-    "310112": "Traders Point",
-    "310113": "Eagle Creek",
-    "310201": "New Augusta",
-    "310203": "Fieldstone and Brookstone",
-    "310204": "Augusta / New Augusta",
-    "310305": "Northwest High School",
-    "310306": "International Marketplace",
-    "310308": "Guion Lakes",
-    "310309": "Snacks / Guion Creek",
-    "310310": "Liberty Creek North",
-    "310311": "Snacks / Guion Creek",
-    "310312": "Deer Creek",
-    "320105": "Misty Lake",
-    "320106": "St Vincent / Greenbriar",
-    "320107": "College Commons",
-    "320108": "St Vincent / Greenbriar",
-    "320109": "St Vincent / Greenbriar",
-    "320202": "North Central",
-    "320203": "Sherwood Forest",
-    "320205": "Keystone at the Crossing",
-    "320206": "Driftwood Hills",
-    "320301": "Clearwater",
-    "320303": "Castleton",
-    "320305": "Ivy Hills",
-    "320306": "Allisonville",
-    "320400": "Allisonville",
-    "320500": "Glendale",
-    "320600": "Ravenswood",
-    "320700": "Warfleigh",
-    "320800": "Meridian Hills/Williams Creek",
-    "320901": "Delaware Trails",
-    "320902": "Crooked Creek",
-    "320903": "Crooked Creek",
-    "321001": "Crooked Creek",
-    "321002": "Crooked Creek Civic League",
-    "321100": "Highland-Kessler",
-    "321200": "Warfleigh",
-    "321300": "Broad Ripple",
-    "321400": "Millersville",
-    "321600": "Devon",
-    "321700": "Canterbury-Chatard",
-    "321800": "Meridian-Kessler",
-    "321900": "Butler-Tarkington",
-    "322000": "Butler-Tarkington",
-    "322100": "Meridian-Kessler",
-    "322200": "Oliver Johnson's Woods",
-    "322300": "Meridian-Kessler",
-    "322400": "Fairgrounds",
-    "322500": "Fairgrounds",
-    "322601": "Meadows",
-    "322602": "Meadows",
-    "322700": "Forest Manor",
-    "330103": "Castleton",
-    "330105": "Castleton",
-    "330106": "I-69/Fall Creek",
-    "330107": "I-69/Fall Creek",
-    "330108": "Geist",
-    "330109": "I-69/Fall Creek",
-    "330203": "Geist",
-    "330204": "Lawrence-Fort Ben-Oaklandon",
-    "330206": "Lawrence Woods",
-    "330208": "Bay Ridge",
-    "330210": "Lawrence",
-    "330211": "Far Eastside",
-    "330212": "Lawrence",
-    "330213": "Oakland Hills at Geist",
-    "330401": "Devonshire",
-    "330500": "Devington",
-    "330600": "Lawrence",
-    "330701": "Lawrence",
-    "330702": "Lawrence",
-    "330803": "Far Eastside",
-    "330804": "Far Eastside",
-    "330805": "Lawrence",
-    "330806": "Far Eastside",
-    "330900": "Devington",
-    "331000": "Devington",
-    "340101": "Chapel Glen",
-    "340102": "Chapel Hill Village",
-    "340108": "Northwest High School",
-    "340111": "Key Meadows",
-    "340112": "Key Meadows",
-    "340113": "Chapel Hill / Ben Davis",
-    "340114": "Key Meadows",
-    "340115": "Aspen Ridge",
-    "340201": "Northwest High School",
-    "340202": "Speedway",
-    "340301": "Eagledale",
-    "340302": "Eagledale",
-    "340400": "Eagledale",
-    "340500": "Venerable Flackville",
-    "340600": "Marian - Cold Springs",
-    "340700": "Speedway",
-    "340800": "Speedway",
-    "340901": "Westridge",
-    "340903": "Speedway",
-    "340904": "Speedway",
-    "341000": "Speedway",
-    "341100": "Near Westside",
-    "341200": "West Side",
-    "341600": "Haughville",
-    "341701": "Near Westside",
-    "341702": "Garden City",
-    "341902": "Chapel Hill / Ben Davis",
-    "341903": "Garden City",
-    "341904": "Garden City",
-    "342000": "Chapel Hill / Ben Davis",
-    "342101": "Chapel Hill / Ben Davis",
-    "342200": "Park Fletcher",
-    "342300": "Mars Hill",
-    "342400": "West Indianapolis",
-    "342500": "Stout Field",
-    "342600": "West Indianapolis",
-    "350100": "Near NW - Riverside",
-    "350300": "Crown Hill",
-    "350400": "Mapleton - Fall Creek",
-    "350500": "Meadows",
-    "350600": "Forest Manor",
-    "350700": "Martindale - Brightwood",
-    "350800": "Martindale - Brightwood",
-    "350900": "Mapleton - Fall Creek",
-    "351000": "Crown Hill",
-    "351200": "Near NW - Riverside",
-    "351500": "Highland Vicinity",
-    "351600": "Fall Creek Place",
-    "351700": "Reagan Park",
-    "351900": "Martindale - Brightwood",
-    "352100": "Martindale - Brightwood",
-    "352300": "Martindale - Brightwood",
-    "352400": "Near Eastside",
-    "352500": "Little Flower",
-    "352600": "Near Eastside",
-    "352700": "Windsor Park",
-    "352800": "Hillside",
-    "353300": "Near Northside",
-    "353500": "Near NW - Riverside",
-    "353600": "Riverside",
-    "354201": "Lockerbie Square",
-    "354202": "Chatham-Arch",
-    "354400": "Holy Cross",
-    "354500": "Near Eastside",
-    "354700": "Near Eastside",
-    "354800": "Near Eastside",
-    "354900": "Near Eastside",
-    "355000": "Englewood",
-    "355100": "Tuxedo Park",
-    "355300": "Emerson Heights",
-    "355400": "Bosart Brown",
-    "355500": "Christian Park",
-    "355600": "Christian Park",
-    "355700": "Christian Park",
-    "355900": "Fountain Square",
-    "356200": "Fletcher Place",
-    "356400": "Near Westside",
-    "356900": "Old Southside",
-    "357000": "Bates-Hendricks",
-    "357100": "Fountain Square",
-    "357200": "Fountain Square",
-    "357300": "Near Southeast",
-    "357400": "Near Southeast",
-    "357500": "Beech Grove",
-    "357601": "Bean Creek",
-    "357602": "Near Southeast",
-    "357800": "Near Southside",
-    "357900": "Garfield Park-South Neighborhood",
-    "358000": "Garfield Park",
-    "358100": "West Indianapolis",
-    "360101": "Eastside",
-    "360102": "Arlington Woods",
-    "360201": "Arlington Woods",
-    "360202": "Far Eastside",
-    "360301": "Far Eastside",
-    "360302": "Arlington Woods",
-    "360401": "Far Eastside",
-    "360402": "Far Eastside",
-    "360405": "Far Eastside",
-    "360406": "Far Eastside",
-    "360407": "Far Eastside",
-    "360501": "East Warren",
-    "360502": "East Warren",
-    "360601": "East Warren",
-    "360602": "East Gate",
-    "360700": "Irvington",
-    "360800": "Warren",
-    "360900": "Community Heights",
-    "361000": "Irvington",
-    "361100": "Irvington Historic District",
-    "361200": "Irvington",
-    "361300": "East Gate",
-    "361401": "Raymond Park",
-    "361402": "Glenroy Village",
-    "361601": "Southeast Warren",
-    "361602": "Southeast Warren",
-    "370201": "Mars Hill",
-    "370203": "Mars Hill",
-    "370204": "Mars Hill",
-    "370303": "Camby",
-    "370304": "West Newton",
-    "370305": "Valley Mills",
-    "370306": "Valley Mills",
-    "380101": "Glenns Valley",
-    "380102": "Sunshine Gardens",
-    "380103": "Sunshine Gardens",
-    "380200": "North Perry",
-    "380301": "University Heights",
-    "380302": "Carson Heights",
-    "380402": "Beech Grove",
-    "380403": "Beech Grove",
-    "380404": "University Heights",
-    "380501": "Edgewood",
-    "380502": "University Heights and Rosedale Hills",
-    "380600": "Southdale",
-    "380700": "Southdale",
-    "380800": "Edgewood",
-    "380901": "Perry Manor",
-    "380902": "I-65 / South Emerson",
-    "381002": "Homecroft",
-    "381003": "Southport",
-    "381004": "South Perry",
-    "381101": "Richling Acres",
-    "381102": "Linden Wood",
-    "381203": "Winchester Village",
-    "381204": "South Perry",
-    "381205": "Richmond Hill",
-    "381206": "Hill Valley Estates",
-    "381207": "Hill Valley Estates",
-    "390102": "Beech Grove",
-    "390103": "Poplar Grove",
-    "390104": "Five Points",
-    "390200": "New Bethel",
-    "390300": "Acton",
-    "390405": "South Franklin",
-    "390406": "Galludet",
-    "390407": "South Franklin",
-    "390408": "Galludet",
-    "390409": "South Franklin",
-    "390410": "I-65 / South Emerson",
-    "390411": "I-65 / South Emerson",
-    "390500": "Crown Hill",
-    "390601": "Brendonwood",
-    "390602": "Lawrence-Fort Ben-Oaklandon",
-    "390700": "Hawthorne",
-    "390801": "Airport",
-    "390802": "Airport",
-    "390900": "Kennedy King",
-    "391001": "Downtown",
-    "391002": "Mile Square",
-}
+# Official neighborhood names from Google Maps Geocoding API, keyed by Marion tract.
+# Written by scripts/01_google_maps_neighborhoods.py as gzipped JSON and loaded
+# on first use instead of being unmarshalled as a literal on every cold start.
+GOOGLE_MAPS_NEIGHBORHOODS_PATH = os.path.join(os.path.dirname(__file__), "data", "google_maps_neighborhoods.json.gz")
+_google_maps_neighborhoods: Optional[Dict[str, str]] = None
+
+def google_maps_neighborhoods() -> Dict[str, str]:
+    """Tract -> Google Maps neighborhood name, decompressed once per worker"""
+    global _google_maps_neighborhoods
+    if _google_maps_neighborhoods is None:
+        with open(GOOGLE_MAPS_NEIGHBORHOODS_PATH, "rb") as fh:
+            _google_maps_neighborhoods = _json_loads(gzip.decompress(fh.read()))
+    return _google_maps_neighborhoods
 
 # Google Maps ZIP code mapping (generated 2025-11-13)
-# Maps census tracts to accurate ZIP codes for listings lookups
+# Maps census tracts to accurate ZIP codes for listings lookups.
+# Only read at import: it is packed into _TRACT_ZIP_KEYS/_TRACT_ZIP_VALUES below and then deleted.
 TRACT_TO_ZIP_MAPPING = {
     # Boone County (FIPS 011)
     "011": {
@@ -1015,8 +850,39 @@ TRACT_TO_ZIP_MAPPING = {
     },
 }
 
-DEFAULT_PRICE_MIN = int(os.environ.get("PRICE_MIN", "150000"))
-DEFAULT_PRICE_MAX = int(os.environ.get("PRICE_MAX", "250000"))
+def _pack_tract_key(county_fips: str, tract: str) -> Optional[int]:
+    """Pack a 3-digit county FIPS + 6-digit tract into one int (county * 1e6 + tract)"""
+    if len(county_fips) != 3 or len(tract) != 6 or not (county_fips + tract).isdigit():
+        return None
+    return int(county_fips) * 1_000_000 + int(tract)
+
+# Packed, sorted view of TRACT_TO_ZIP_MAPPING for lookups: parallel uint32 keys
+# and uint16 ZIPs (all Central Indiana ZIPs fit) instead of ~700 small strings
+_TRACT_ZIP_PAIRS = sorted(
+    (_pack_tract_key(county_fips, tract), int(zip_code))
+    for county_fips, tracts in TRACT_TO_ZIP_MAPPING.items()
+    for tract, zip_code in tracts.items()
+)
+_TRACT_ZIP_KEYS = array("I", [key for key, _ in _TRACT_ZIP_PAIRS])
+_TRACT_ZIP_VALUES = array("H", [zip_code for _, zip_code in _TRACT_ZIP_PAIRS])
+del _TRACT_ZIP_PAIRS
+
+# Marion tracts share 3-digit prefixes (3101xx, 3102xx, ...). Index them as a
+# two-level trie so a tract missing from the mapping (e.g. a new subdivision)
+# can fall back to the ZIP of its nearest sibling tract.
+_MARION_ZIP_TRIE: Dict[str, Dict[str, str]] = {}
+for _tract, _zip in TRACT_TO_ZIP_MAPPING["097"].items():
+    _MARION_ZIP_TRIE.setdefault(_tract[:3], {})[_tract[3:]] = _zip
+del _tract, _zip
+del TRACT_TO_ZIP_MAPPING  # everything reads the packed arrays (or the trie) from here on
+
+def _mapped_tracts(county_fips: str) -> List[str]:
+    """6-digit tracts in the ZIP table for one county, read back from the packed keys"""
+    lo = _pack_tract_key(county_fips, "000000")
+    if lo is None:
+        return []
+    i, j = bisect_left(_TRACT_ZIP_KEYS, lo), bisect_left(_TRACT_ZIP_KEYS, lo + 1_000_000)
+    return [f"{key % 1_000_000:06d}" for key in _TRACT_ZIP_KEYS[i:j]]
 
 CENTRAL_IN_COUNTIES = {
     "Boone": "011",
@@ -1040,12 +906,148 @@ ACS_VARS = {
 }
 
 MAX_MARKET_LOOKUPS_DEFAULT = 10
+MARKET_LOOKUP_WORKERS = 5  # Concurrent RapidAPI calls per analysis (rate limit protection)
 REQUEST_TIMEOUT = 60
 
+# --- Shared HTTP session ---
+# Keep-alive pooling for Census/TIGER/RapidAPI, with backoff on throttling and 5xx.
+# Retry only applies to idempotent methods, so RapidAPI POSTs are never replayed.
+_http = requests.Session()
+_http.mount("https://", HTTPAdapter(
+    pool_connections=20,
+    pool_maxsize=50,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504],
+                      raise_on_status=False),
+))
+
+# Shared worker pool for overlapping independent, blocking lookups within a request
+_io_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hfa-io")
+
 # --- Simple in-memory caches ---
-_census_cache: Dict[str, Dict[str, Any]] = {}
+
+class TTLCache:
+    """
+    In-memory cache whose entries expire ttl_seconds after they were set (monotonic clock),
+    or after a shorter per-entry ttl passed to set(). With maxsize set, inserting into a full cache evicts the oldest-set entry.
+    Safe to share across the worker threads of one host process.
+    """
+
+    def __init__(self, ttl_seconds: float, maxsize: Optional[int] = None):
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        self._entries: Dict[Any, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            if time.monotonic() >= entry[0]:
+                del self._entries[key]
+                return default
+            return entry[1]
+
+    def set(self, key: Any, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        expires = time.monotonic() + (self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds))
+        with self._lock:
+            # Re-inserting moves the key to the end, so dict order stays oldest-set first
+            self._entries.pop(key, None)
+            if self.maxsize is not None and len(self._entries) >= self.maxsize:
+                del self._entries[next(iter(self._entries))]
+            self._entries[key] = (expires, value)
+
+    def pop(self, key: Any) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def keys(self) -> List[Any]:
+        """Snapshot of the unexpired keys, oldest-set first"""
+        now = time.monotonic()
+        with self._lock:
+            return [key for key, (expires, _) in self._entries.items() if now < expires]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class DiskCache:
+    """
+    SQLite-backed second tier for the slow, static lookups (ACS, TIGER) so a restarted
+    worker on the same instance doesn't refetch them. Values are gzipped JSON; expiry is
+    wall-clock since entries outlive the process. Any SQLite/OS error turns the tier off
+    for the rest of the process and callers just fall through to the network.
+    """
+
+    def __init__(self, path: str, table: str):
+        self.path = path
+        self.table = table
+        self._disabled = not path
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5)
+        if not self._ready:
+            with conn:
+                conn.execute(f"CREATE TABLE IF NOT EXISTS {self.table} (key TEXT PRIMARY KEY, expires REAL, value BLOB)")
+                conn.execute(f"DELETE FROM {self.table} WHERE expires < ?", (time.time(),))
+            self._ready = True
+        return conn
+
+    def _disable(self, e: Exception) -> None:
+        logging.warning("Disk cache %s disabled: %s", self.path, e)
+        self._disabled = True
+
+    def get_entry(self, key: str) -> Optional[Tuple[Any, float]]:
+        """(value, seconds until it expires) for a live entry, or None"""
+        if self._disabled:
+            return None
+        try:
+            with closing(self._connect()) as conn:
+                row = conn.execute(f"SELECT expires, value FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        except (sqlite3.Error, OSError) as e:
+            self._disable(e)
+            return None
+        if row is None:
+            return None
+        remaining = row[0] - time.time()
+        if remaining <= 0:
+            return None
+        try:
+            value = _json_loads(gzip.decompress(row[1]))
+        except (OSError, EOFError, zlib.error, ValueError) as e:
+            # Corrupt/truncated row: drop it so the next lookup refetches instead of failing again
+            logging.warning("Disk cache %s: discarding unreadable entry %s: %s", self.path, key, e)
+            self.delete(key)
+            return None
+        return value, remaining
+
+    def delete(self, key: str) -> None:
+        if self._disabled:
+            return
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+        except (sqlite3.Error, OSError) as e:
+            self._disable(e)
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        if self._disabled:
+            return
+        blob = gzip.compress(_json_dumps(value))
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?)",
+                             (key, time.time() + ttl_seconds, blob))
+        except (sqlite3.Error, OSError) as e:
+            self._disable(e)
+
+_MISSING = object()  # TTLCache.get default for caches that store None as a real value
+
 CACHE_DURATION_HOURS = 24
-_dom_cache: Dict[str, Optional[int]] = {}
+DOM_CACHE_HOURS = 24
+_census_cache = TTLCache(CACHE_DURATION_HOURS * 3600.0, maxsize=256)
+_census_disk_cache = DiskCache(CFG.disk_cache_path, "acs_county")
+_dom_cache = TTLCache(DOM_CACHE_HOURS * 3600.0, maxsize=5_000)  # { zip: median DOM or None }
 
 def safe_int(x: Any) -> Optional[int]:
     """Convert to int, treating Census sentinel values (negatives) as None"""
@@ -1061,14 +1063,18 @@ def safe_int(x: Any) -> Optional[int]:
         return None
 
 def clamp01(x: float) -> float:
-    return max(0.0, min(1.0, x))
+    # Conditional expression instead of max(min()): no builtin calls on the scoring hot path.
+    # Inclusive bounds so 0/1 (and -0.0) still come back as the floats 0.0/1.0.
+    return 0.0 if x <= 0.0 else (1.0 if x >= 1.0 else x)
 
+@lru_cache(maxsize=8192)
 def tract_id_human(tract_str: str) -> str:
     if not tract_str:
         return ""
     t = tract_str.zfill(6)
     return f"{t[:4]}.{t[4:]}"
 
+@lru_cache(maxsize=8192)
 def has_recent_starbucks(neighborhood: str, county_name: str) -> bool:
     """Check if neighborhood/city has a recent Starbucks opening (2024-2025)"""
     # Check full neighborhood name
@@ -1093,95 +1099,99 @@ def has_recent_starbucks(neighborhood: str, county_name: str) -> bool:
 
     return False
 
-def neighborhood_label(county_name: str, tract: str) -> str:
-    """Map census tracts to recognizable neighborhoods/cities using Google Maps data"""
+# Fallback tract-code ranges for Marion tracts Google Maps doesn't cover:
+# label i applies while code < bound i (first 4 digits of the tract)
+_MARION_FALLBACK_BOUNDS = (3120, 3140, 3160, 3180, 3200, 3300, 3320, 3380, 3420, 3480, 3540, 3600, 3680, 3780, 3880)
+_MARION_FALLBACK_LABELS = (
+    "Near Eastside",
+    "Eastside",
+    "Far Eastside",
+    "Lawrence/Castleton",
+    "Broad Ripple/Meridian-Kessler",
+    "Near Southeast/Fountain Square",
+    "Near Westside/Haughville",
+    "Irvington/Warren Park",
+    "Near Southside/Garfield Park",
+    "Southport/Beech Grove",
+    "Perry Township",
+    "Decatur/Southwest",
+    "Pike Township/Northwest",
+    "Washington Township",
+    "Lawrence Township",
+    "Wayne Township/Southwest",
+)
+
+# Suburban counties: label i applies while head <= bound i (first 2 digits of the tract)
+_COUNTY_LABEL_TABLES: Dict[str, Tuple[Tuple[int, ...], Tuple[str, ...]]] = {
+    # Wealthy suburbs - break into cities
+    "Hamilton": ((8, 15, 25, 35, 50, 70), (
+        "Noblesville", "Westfield", "Carmel — North", "Carmel — South/Keystone",
+        "Fishers — North", "Fishers — South/Geist", "Hamilton County — North suburbs",
+    )),
+    "Hendricks": ((15, 35, 50), ("Avon", "Plainfield", "Brownsburg", "Danville/Hendricks County")),
+    "Johnson": ((20, 40, 60), ("Greenwood", "Franklin", "Whiteland/New Whiteland", "Johnson County — South suburbs")),
+    "Boone": ((20, 50), ("Zionsville", "Lebanon", "Boone County — Whitestown area")),
+    "Madison": ((10, 20, 35, 50), (
+        "Anderson — West Side", "Anderson — Downtown/Central", "Anderson — East Side",
+        "Anderson — South", "Madison County — Pendleton/Chesterfield",
+    )),
+    "Shelby": ((30,), ("Shelbyville — Central", "Shelby County — Outlying")),
+    "Morgan": ((30,), ("Martinsville", "Morgan County — Outlying")),
+    "Hancock": ((30,), ("Greenfield", "Hancock County — Outlying")),
+}
+
+def _neighborhood_label_uncached(county_name: str, tract: str) -> str:
     t = (tract or "").zfill(6)
 
     # For Marion County (Indianapolis), use Google Maps official neighborhood names
     if county_name == "Marion":
         # Check Google Maps data first (most accurate!)
-        google_neighborhood = GOOGLE_MAPS_NEIGHBORHOODS.get(t)
+        google_neighborhood = google_maps_neighborhoods().get(t)
         if google_neighborhood:
             return google_neighborhood
 
-        # Fallback to manual mapping if Google Maps doesn't have this tract
+        # Fallback to manual ranges if Google Maps doesn't have this tract
         try:
             code = int(t[:4]) if len(t) >= 4 else 0
-        except:
+        except ValueError:
             code = 0
-
-        # Fallback ranges (shouldn't hit these often with Google Maps data)
-        if code < 3120:  return "Near Eastside"
-        if code < 3140:  return "Eastside"
-        if code < 3160:  return "Far Eastside"
-        if code < 3180:  return "Lawrence/Castleton"
-        if code < 3200:  return "Broad Ripple/Meridian-Kessler"
-        if code < 3300:  return "Near Southeast/Fountain Square"
-        if code < 3320:  return "Near Westside/Haughville"
-        if code < 3380:  return "Irvington/Warren Park"
-        if code < 3420:  return "Near Southside/Garfield Park"
-        if code < 3480:  return "Southport/Beech Grove"
-        if code < 3540:  return "Perry Township"
-        if code < 3600:  return "Decatur/Southwest"
-        if code < 3680:  return "Pike Township/Northwest"
-        if code < 3780:  return "Washington Township"
-        if code < 3880:  return "Lawrence Township"
-        return "Wayne Township/Southwest"
+        return _MARION_FALLBACK_LABELS[bisect_right(_MARION_FALLBACK_BOUNDS, code)]
 
     # For other counties, use 2-digit codes as before
+    table = _COUNTY_LABEL_TABLES.get(county_name)
+    if table is None:
+        return f"{county_name} County"
+    bounds, labels = table
     head = int(t[:2]) if t[:2].isdigit() else 0
+    return labels[bisect_left(bounds, head)]
 
-    if county_name == "Hamilton":
-        # Wealthy suburbs - break into cities
-        if head <= 8:  return "Noblesville"
-        if head <= 15:  return "Westfield"
-        if head <= 25:  return "Carmel — North"
-        if head <= 35:  return "Carmel — South/Keystone"
-        if head <= 50:  return "Fishers — North"
-        if head <= 70:  return "Fishers — South/Geist"
-        return "Hamilton County — North suburbs"
-
-    if county_name == "Hendricks":
-        if head <= 15:  return "Avon"
-        if head <= 35:  return "Plainfield"
-        if head <= 50:  return "Brownsburg"
-        return "Danville/Hendricks County"
-
-    if county_name == "Johnson":
-        if head <= 20:  return "Greenwood"
-        if head <= 40:  return "Franklin"
-        if head <= 60:  return "Whiteland/New Whiteland"
-        return "Johnson County — South suburbs"
-
-    if county_name == "Boone":
-        if head <= 20:  return "Zionsville"
-        if head <= 50:  return "Lebanon"
-        return "Boone County — Whitestown area"
-
-    if county_name == "Madison":
-        if head <= 10:  return "Anderson — West Side"
-        if head <= 20:  return "Anderson — Downtown/Central"
-        if head <= 35:  return "Anderson — East Side"
-        if head <= 50:  return "Anderson — South"
-        return "Madison County — Pendleton/Chesterfield"
-
-    if county_name == "Shelby":
-        if head <= 30:  return "Shelbyville — Central"
-        return "Shelby County — Outlying"
-
-    if county_name == "Morgan":
-        if head <= 30:  return "Martinsville"
-        return "Morgan County — Outlying"
-
-    if county_name == "Hancock":
-        if head <= 30:  return "Greenfield"
-        return "Hancock County — Outlying"
-
-    return f"{county_name} County"
+_NEIGHBORHOOD_INDEX: Dict[Tuple[str, str], str] = {}
+
+def _neighborhood_index() -> Dict[Tuple[str, str], str]:
+    """
+    (county_name, 6-digit tract) -> label for every tract we know about (the ZIP table plus the
+    Google Maps table). Built on first use so the gzipped Google Maps data stays lazily loaded.
+    """
+    if not _NEIGHBORHOOD_INDEX:
+        for county_name, county_fips in CENTRAL_IN_COUNTIES.items():
+            tracts = set(_mapped_tracts(county_fips))
+            if county_name == "Marion":
+                tracts.update(google_maps_neighborhoods())
+            for t in tracts:
+                _NEIGHBORHOOD_INDEX[(county_name, t)] = _neighborhood_label_uncached(county_name, t)
+    return _NEIGHBORHOOD_INDEX
+
+def neighborhood_label(county_name: str, tract: str) -> str:
+    """Map census tracts to recognizable neighborhoods/cities using Google Maps data"""
+    t = (tract or "").zfill(6)
+    label = _neighborhood_index().get((county_name, t))
+    if label is None:
+        label = _neighborhood_label_uncached(county_name, t)
+    return label
 
 # --- Location ID cache ---
-_location_id_cache = {}  # { "neighborhood_city": {"ts": ISO_UTC, "location_data": {...}} }
 LOCATION_ID_CACHE_DAYS = 30  # Location IDs don't change
+_location_id_cache = TTLCache(LOCATION_ID_CACHE_DAYS * 86400.0, maxsize=10_000)  # { "neighborhood_city": location_data }
 
 def resolve_neighborhood_to_location_id(neighborhood: str, city: str, state_code: str) -> Optional[dict]:
     """
@@ -1191,32 +1201,27 @@ def resolve_neighborhood_to_location_id(neighborhood: str, city: str, state_code
     cache_key = f"{neighborhood}_{city}_{state_code}".lower()
 
     # Check cache
-    if cache_key in _location_id_cache:
-        entry = _location_id_cache[cache_key]
-        try:
-            ts = datetime.fromisoformat(entry["ts"])
-            if datetime.utcnow() - ts < timedelta(days=LOCATION_ID_CACHE_DAYS):
-                return entry.get("location_data")
-        except Exception:
-            pass
+    cached = _location_id_cache.get(cache_key)
+    if cached is not None:
+        return cached
 
     # Call autocomplete API
     search_query = f"{neighborhood} {city}"
     headers = {
-        "x-rapidapi-key": RAPIDAPI_KEY,
-        "x-rapidapi-host": RAPIDAPI_HOST,
+        "x-rapidapi-key": CFG.rapidapi_key,
+        "x-rapidapi-host": CFG.rapidapi_host,
     }
 
     try:
         logging.info(f"Resolving location: '{search_query}'")
-        r = requests.get(
-            RAPIDAPI_AUTOCOMPLETE_URL,
+        r = _http.get(
+            CFG.rapidapi_autocomplete_url,
             params={"input": search_query, "limit": "10"},
             headers=headers,
             timeout=REQUEST_TIMEOUT
         )
         r.raise_for_status()
-        data = r.json()
+        data = _json_loads(r.content)
 
         # Log raw response for debugging
         autocomplete_results = data.get("autocomplete", [])
@@ -1244,10 +1249,7 @@ def resolve_neighborhood_to_location_id(neighborhood: str, city: str, state_code
                     logging.info(f"✓ Matched location: {location_data}")
 
                     # Cache it
-                    _location_id_cache[cache_key] = {
-                        "ts": datetime.utcnow().isoformat(),
-                        "location_data": location_data
-                    }
+                    _location_id_cache.set(cache_key, location_data)
                     return location_data
 
         logging.warning(f"✗ No matching location found for '{search_query}' in {len(autocomplete_results)} results")
@@ -1257,45 +1259,95 @@ def resolve_neighborhood_to_location_id(neighborhood: str, city: str, state_code
         logging.error(f"✗ Exception resolving location '{search_query}': {e}")
         return None
 
+# --- Listings ---
+
+@dataclass(frozen=True, slots=True)
+class Listing:
+    """One normalized for-sale listing from the RapidAPI feed"""
+    price: int
+    address: str
+    zip: str
+    beds: Any
+    baths: Any
+    dom: Optional[int]
+    url: str
+    photo: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "price": self.price,
+            "address": self.address,
+            "zip": self.zip,
+            "beds": self.beds,
+            "baths": self.baths,
+            "dom": self.dom,
+            "url": self.url,
+            "photo": self.photo,
+        }
+
 # --- Listings cache (per ZIP) ---
-_listings_cache = {}  # { zip: {"ts": ISO_UTC, "data": {...}} }
 LISTINGS_CACHE_HOURS = 6
 LISTINGS_CACHE_VERSION = "v3"  # Increment to invalidate all cached listings
+_listings_cache = TTLCache(LISTINGS_CACHE_HOURS * 3600.0, maxsize=2_000)  # { zip: {...} }
 
 def _cache_get_listings(zip_code: str):
-    entry = _listings_cache.get(zip_code)
-    if not entry:
-        return None
-    try:
-        ts = datetime.fromisoformat(entry["ts"])
-        if datetime.utcnow() - ts > timedelta(hours=LISTINGS_CACHE_HOURS):
-            del _listings_cache[zip_code]
-            return None
-    except Exception:
-        del _listings_cache[zip_code]
-        return None
-    return entry["data"]
+    return _listings_cache.get(zip_code)
 
 def _cache_set_listings(zip_code: str, data: dict) -> None:
-    _listings_cache[zip_code] = {"ts": datetime.utcnow().isoformat(), "data": data}
+    _listings_cache.set(zip_code, data)
+
+# Concurrent misses for the same key share one RapidAPI call (the UI fires several listings requests per ZIP)
+_listings_inflight: Dict[str, Future] = {}
+_listings_inflight_lock = threading.Lock()
+
+def _coalesce_listings_fetch(cache_key: str, fetch: Callable[[], Any]) -> Any:
+    """Run fetch() once per cache_key at a time; concurrent callers wait for and share its result"""
+    with _listings_inflight_lock:
+        pending = _listings_inflight.get(cache_key)
+        if pending is None:
+            pending = _listings_inflight[cache_key] = Future()
+            leader = True
+        else:
+            leader = False
+    if not leader:
+        return pending.result()
+
+    try:
+        result = fetch()
+    except BaseException as e:
+        pending.set_exception(e)
+        raise
+    else:
+        pending.set_result(result)
+        return result
+    finally:
+        with _listings_inflight_lock:
+            _listings_inflight.pop(cache_key, None)
 
 # === CENSUS DATA WITH CACHE/RETRY ===
 
+def _census_cache_key(county_fips: str) -> str:
+    # Keyed by vintage too, so bumping ACS_YEAR never serves last year's rows (memory or disk)
+    return f"{ACS_YEAR}:{county_fips}"
+
 def get_cached_census_data(county_fips: str) -> Optional[List[List[str]]]:
-    if county_fips not in _census_cache:
-        return None
-    cache_entry = _census_cache[county_fips]
-    cache_time = datetime.fromisoformat(cache_entry["cached_at"])
-    if datetime.utcnow() - cache_time > timedelta(hours=CACHE_DURATION_HOURS):
-        del _census_cache[county_fips]
-        return None
-    return cache_entry["data"]
+    key = _census_cache_key(county_fips)
+    data = _census_cache.get(key)
+    if data is None:
+        entry = _census_disk_cache.get_entry(key)
+        if entry is not None:
+            # Promoted with the row's remaining lifetime, not a fresh full TTL
+            data, remaining = entry
+            _census_cache.set(key, data, ttl_seconds=remaining)
+    return data
 
 def cache_census_data(county_fips: str, data: List[List[str]]) -> None:
-    _census_cache[county_fips] = {"data": data, "cached_at": datetime.utcnow().isoformat()}
+    key = _census_cache_key(county_fips)
+    _census_cache.set(key, data)
+    _census_disk_cache.set(key, data, _census_cache.ttl_seconds)
 
-def fetch_census_data_with_retry(county_name: str, county_fips: str, max_retries: int = 3) -> Optional[List[List[str]]]:
-    cached = get_cached_census_data(county_fips)
+def fetch_census_data_with_retry(county_name: str, county_fips: str, refresh: bool = False) -> Optional[List[List[str]]]:
+    cached = None if refresh else get_cached_census_data(county_fips)
     if cached is not None:
         logging.info("✅ Using cached ACS for %s", county_name)
         return cached
@@ -1305,60 +1357,237 @@ def fetch_census_data_with_retry(county_name: str, county_fips: str, max_retries
         "for": "tract:*",
         "in": f"state:18 county:{county_fips}",
     }
-    for attempt in range(max_retries):
+    # Backoff on 503s/timeouts is handled by the session's Retry policy
+    try:
+        r = _http.get(ACS_BASE, params=params, timeout=REQUEST_TIMEOUT)
+        r.raise_for_status()
+        data = _json_loads(r.content)
+    except (requests.exceptions.RequestException, ValueError):  # ValueError: non-JSON body (orjson/json decode errors)
+        return None
+    if not data or len(data) < 2:
+        return None
+    cache_census_data(county_fips, data)
+    return data
+
+def fetch_census_for_counties(counties: Dict[str, str], refresh: bool = False) -> Dict[str, Optional[List[List[str]]]]:
+    """
+    ACS rows for every county ({county_name: county_fips}), fetched concurrently.
+    Returns {county_name: data or None} in the input order, so downstream ordering is stable.
+    """
+    if not counties:
+        return {}
+    with ThreadPoolExecutor(max_workers=len(counties)) as pool:
+        results = pool.map(lambda item: fetch_census_data_with_retry(*item, refresh=refresh), counties.items())
+        return dict(zip(counties, results))
+
+def fetch_census_data_batch(counties: Dict[str, str], refresh: bool = False) -> Dict[str, Optional[List[List[str]]]]:
+    """
+    ACS rows for every county ({county_name: county_fips}) with a single Census request for all
+    uncached counties (in=state:18 county:a,b,c). The response is split back per county and
+    cached like a single-county fetch. If the batch call fails, or leaves a county out, those
+    counties go through the concurrent per-county path (with its retries).
+    refresh skips cache reads (results are still cached).
+    Returns {county_name: data or None} in the input order.
+    """
+    result: Dict[str, Optional[List[List[str]]]] = {}
+    missing: Dict[str, str] = {}
+    for county_name, county_fips in counties.items():
+        result[county_name] = None if refresh else get_cached_census_data(county_fips)
+        if result[county_name] is None:
+            missing[county_name] = county_fips
+
+    if len(missing) > 1:
+        params = {
+            "get": ",".join(ACS_VARS.keys()),
+            "for": "tract:*",
+            "in": f"state:18 county:{','.join(missing.values())}",
+        }
+        by_fips: Dict[str, List[List[str]]] = {}
         try:
-            timeout = REQUEST_TIMEOUT * (attempt + 1)
-            r = requests.get(ACS_BASE, params=params, timeout=timeout)
-            if r.status_code == 503:
-                if attempt < max_retries - 1:
-                    time.sleep(2 ** attempt)
-                    continue
-                return None
+            r = _http.get(ACS_BASE, params=params, timeout=REQUEST_TIMEOUT)
             r.raise_for_status()
-            data = r.json()
-            if not data or len(data) < 2:
-                return None
-            cache_census_data(county_fips, data)
-            return data
-        except requests.exceptions.Timeout:
-            if attempt < max_retries - 1:
-                time.sleep(2 ** attempt)
-            else:
-                return None
-        except requests.exceptions.RequestException:
-            if attempt < max_retries - 1:
-                time.sleep(2 ** attempt)
-            else:
-                return None
-    return None
+            data = _json_loads(r.content)
+            if data and len(data) >= 2:
+                header = data[0]
+                county_col = header.index("county")
+                for row in data[1:]:
+                    by_fips.setdefault(row[county_col], [header]).append(row)
+        except (requests.exceptions.RequestException, ValueError, LookupError, TypeError) as e:
+            # Network errors, a non-JSON body, or a payload without the expected header/columns
+            logging.warning("Batched ACS fetch failed, falling back to per-county: %s", e)
+            by_fips = {}
+
+        for county_name, county_fips in list(missing.items()):
+            county_data = by_fips.get(county_fips)
+            if county_data is not None:
+                cache_census_data(county_fips, county_data)
+                result[county_name] = county_data
+                del missing[county_name]
+
+    if missing:
+        result.update(fetch_census_for_counties(missing, refresh=refresh))
+    return result
+
+def acs_rows_to_tracts(county_name: str, data: List[List[str]]) -> List[Dict[str, Any]]:
+    """
+    Turn one county's ACS response (header row + rows) into unscored tract records.
+    Works column-wise: each column's position is resolved once from the header row and
+    converted in one comprehension, rather than building a dict per row.
+    """
+    headers = data[0]; rows = data[1:]
+    position = {h: i for i, h in enumerate(headers)}
+
+    def column(name: str) -> List[Any]:
+        i = position.get(name)
+        return [row[i] for row in rows] if i is not None else [None] * len(rows)
+
+    def int_column(name: str) -> List[Optional[int]]:
+        return [safe_int(v) for v in column(name)]
+
+    tracts: List[Dict[str, Any]] = []
+    for state, county, tract, pop, total_housing, vacant, mhv, income, rent in zip(
+        column("state"), column("county"), column("tract"),
+        int_column("B01003_001E"), int_column("B25001_001E"), int_column("B25002_003E"),
+        int_column("B25077_001E"), int_column("B19013_001E"), int_column("B25064_001E"),
+    ):
+        vacancy_pct = 0.0
+        if total_housing and vacant is not None and total_housing > 0:
+            vacancy_pct = (vacant / total_housing) * 100.0
+
+        tracts.append({
+            "state": state,
+            "county": county,
+            "tract": tract,
+            "county_name": county_name,
+            "neighborhood": neighborhood_label(county_name, tract),
+            "tract_id": tract_id_human(tract or ""),
+            "total_pop": pop,
+            "housing_units": total_housing,
+            "housing_vacant": vacant,
+            "vacancy_pct": round(vacancy_pct, 1),
+            "median_home_value": mhv,
+            "median_income": income,
+            "median_gross_rent": rent,
+        })
+    return tracts
 
 # === CENSUS TRACT BOUNDARIES ===
 
 # Cache for tract boundary polygons
-_tract_boundaries_cache = {}  # { tract_geoid: {"ts": ISO_UTC, "polygon": [[[lon, lat], ...]]} }
 TRACT_BOUNDARY_CACHE_DAYS = 30  # Boundaries don't change often
+_tract_boundaries_cache = TTLCache(TRACT_BOUNDARY_CACHE_DAYS * 86400.0, maxsize=5_000)  # { tract_geoid: [[[lon, lat], ...]] }
+
+_tract_boundaries_disk_cache = DiskCache(CFG.disk_cache_path, "tract_boundary")
+# Ray-casting form of each cached boundary (PreparedPolygon, or None), built on first use
+_prepared_boundaries = TTLCache(TRACT_BOUNDARY_CACHE_DAYS * 86400.0, maxsize=5_000)
+
+# Coarse spatial index over cached boundaries: grid cell -> GEOIDs whose bounding box touches it.
+# Built on the first tracts_containing_point call after the boundary cache changes, from that
+# cache's live entries, so it is never larger than the cache and costs nothing until queried.
+TRACT_GRID_DEGREES = 0.05  # ~5 km cells, so a suburban tract spans only a handful
+_tract_grid: Optional[Dict[Tuple[int, int], List[str]]] = None
+_tract_grid_version = 0  # bumped on every boundary insert; a grid built from an older version is discarded
+_tract_grid_lock = threading.Lock()
+
+def _grid_cell(lon: float, lat: float) -> Tuple[int, int]:
+    return math.floor(lon / TRACT_GRID_DEGREES), math.floor(lat / TRACT_GRID_DEGREES)
+
+def _remember_boundary(tract_geoid: str) -> None:
+    """Invalidate the prepared form and the grid after a boundary is (re)cached; both rebuild on use."""
+    global _tract_grid, _tract_grid_version
+    _prepared_boundaries.pop(tract_geoid)
+    with _tract_grid_lock:
+        _tract_grid = None
+        _tract_grid_version += 1
+
+def _build_tract_grid() -> Dict[Tuple[int, int], List[str]]:
+    grid: Dict[Tuple[int, int], List[str]] = {}
+    for tract_geoid in _tract_boundaries_cache.keys():
+        prepared = _prepared_tract(tract_geoid)
+        if prepared is None:
+            continue
+        x0, y0 = _grid_cell(prepared.min_lon, prepared.min_lat)
+        x1, y1 = _grid_cell(prepared.max_lon, prepared.max_lat)
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                grid.setdefault((x, y), []).append(tract_geoid)
+    return grid
+
+def _current_tract_grid() -> Dict[Tuple[int, int], List[str]]:
+    global _tract_grid
+    with _tract_grid_lock:
+        grid, version = _tract_grid, _tract_grid_version
+    if grid is None:
+        grid = _build_tract_grid()
+        with _tract_grid_lock:
+            if _tract_grid_version == version:
+                _tract_grid = grid
+    return grid
 
 def _cache_get_tract_boundary(tract_geoid: str):
     """Get cached tract boundary polygon."""
-    entry = _tract_boundaries_cache.get(tract_geoid)
-    if not entry:
-        return None
-    try:
-        ts = datetime.fromisoformat(entry["ts"])
-        if datetime.utcnow() - ts > timedelta(days=TRACT_BOUNDARY_CACHE_DAYS):
-            del _tract_boundaries_cache[tract_geoid]
-            return None
-    except Exception:
-        del _tract_boundaries_cache[tract_geoid]
-        return None
-    return entry["polygon"]
+    polygon = _tract_boundaries_cache.get(tract_geoid)
+    if polygon is None:
+        entry = _tract_boundaries_disk_cache.get_entry(tract_geoid)
+        if entry is not None:
+            polygon, remaining = entry
+            _tract_boundaries_cache.set(tract_geoid, polygon, ttl_seconds=remaining)
+            _remember_boundary(tract_geoid)
+    return polygon
 
 def _cache_set_tract_boundary(tract_geoid: str, polygon: List) -> None:
     """Cache tract boundary polygon."""
-    _tract_boundaries_cache[tract_geoid] = {
-        "ts": datetime.utcnow().isoformat(),
-        "polygon": polygon
-    }
+    _tract_boundaries_cache.set(tract_geoid, polygon)
+    _remember_boundary(tract_geoid)
+    _tract_boundaries_disk_cache.set(tract_geoid, polygon, _tract_boundaries_cache.ttl_seconds)
+
+TIGER_TRACTS_URL = "https://tigerweb.geo.census.gov/arcgis/rest/services/TIGERweb/tigerWMS_ACS2023/MapServer/8/query"
+TIGER_BULK_CHUNK = 50  # GEOIDs per IN (...) clause; keeps the query string well under URL limits
+
+def fetch_tract_boundaries_bulk(geoids: List[str]) -> Dict[str, List]:
+    """
+    Fetch boundary rings for many tracts, one TIGER query per TIGER_BULK_CHUNK GEOIDs.
+    Cached GEOIDs are served from the cache; everything fetched is cached.
+    Returns { geoid: rings } for the GEOIDs that resolved.
+    """
+    found: Dict[str, List] = {}
+    missing = []
+    for geoid in dict.fromkeys(geoids):
+        cached = _cache_get_tract_boundary(geoid)
+        if cached is not None:
+            found[geoid] = cached
+        else:
+            missing.append(geoid)
+
+    for i in range(0, len(missing), TIGER_BULK_CHUNK):
+        chunk = missing[i:i + TIGER_BULK_CHUNK]
+        params = {
+            "where": "GEOID IN (" + ",".join(f"'{g}'" for g in chunk) + ")",
+            "outFields": "GEOID",  # only the key; the full attribute block is most of the payload
+            "returnGeometry": "true",
+            "geometryPrecision": 6,  # ArcGIS otherwise emits ~15 digits per coordinate
+            "f": "json"
+        }
+        try:
+            r = _http.get(TIGER_TRACTS_URL, params=params, timeout=REQUEST_TIMEOUT)
+            r.raise_for_status()
+            data = _json_loads(r.content)
+        except Exception as e:
+            logging.warning(f"Failed to fetch boundaries for {len(chunk)} tracts: {e}")
+            continue
+
+        for feature in data.get("features", []):
+            geoid = (feature.get("attributes") or {}).get("GEOID")
+            rings = (feature.get("geometry") or {}).get("rings", [])
+            if geoid in found or not rings:
+                continue
+            _cache_set_tract_boundary(geoid, rings)
+            found[geoid] = rings
+
+    for geoid in missing:
+        if geoid not in found:
+            logging.warning(f"No boundary found for tract {geoid}")
+    return found
 
 def fetch_tract_boundary(state_fips: str, county_fips: str, tract_code: str) -> Optional[List]:
     """
@@ -1367,88 +1596,117 @@ def fetch_tract_boundary(state_fips: str, county_fips: str, tract_code: str) ->
     """
     # Build full GEOID: state(2) + county(3) + tract(6)
     geoid = f"{state_fips}{county_fips}{tract_code}"
+    return fetch_tract_boundaries_bulk([geoid]).get(geoid)
 
-    # Check cache first
-    cached = _cache_get_tract_boundary(geoid)
-    if cached is not None:
-        return cached
+def _prepare_ring_edges(ring: List) -> Tuple[Tuple[float, float, float, float, float, float, float], ...]:
+    """
+    Precompute the ray-casting edge table for a ring: one tuple per non-horizontal edge of
+    (p1_lon, p1_lat, p2_lon, p2_lat, min_lat, max_lat, max_lon). Horizontal edges can never
+    toggle the ray test, so they're dropped up front.
+    """
+    edges = []
+    n = len(ring)
+    p1_lon, p1_lat = ring[0]
+    for i in range(1, n + 1):
+        p2_lon, p2_lat = ring[i % n]
+        if p1_lat != p2_lat:
+            edges.append((p1_lon, p1_lat, p2_lon, p2_lat,
+                          min(p1_lat, p2_lat), max(p1_lat, p2_lat), max(p1_lon, p2_lon)))
+        p1_lon, p1_lat = p2_lon, p2_lat
+    return tuple(edges)
 
-    # Fetch from TIGER API
-    tiger_url = "https://tigerweb.geo.census.gov/arcgis/rest/services/TIGERweb/tigerWMS_ACS2023/MapServer/8/query"
-    params = {
-        "where": f"GEOID='{geoid}'",
-        "outFields": "*",
-        "returnGeometry": "true",
-        "f": "json"
-    }
+def _ray_cast(point_lon: float, point_lat: float, edges) -> bool:
+    inside = False
+    for p1_lon, p1_lat, p2_lon, p2_lat, min_lat, max_lat, max_lon in edges:
+        if min_lat < point_lat <= max_lat and point_lon <= max_lon:
+            if p1_lon == p2_lon or point_lon <= (point_lat - p1_lat) * (p2_lon - p1_lon) / (p2_lat - p1_lat) + p1_lon:
+                inside = not inside
+    return inside
 
-    try:
-        r = requests.get(tiger_url, params=params, timeout=REQUEST_TIMEOUT)
-        r.raise_for_status()
-        data = r.json()
+class PreparedPolygon(NamedTuple):
+    """Exterior-ring edge table plus the only box in which the ray test can come out inside"""
+    edges: Tuple[Tuple[float, float, float, float, float, float, float], ...]
+    min_lat: float
+    max_lat: float
+    max_lon: float
+    min_lon: float  # not needed by the ray test; used to place the tract in the spatial grid
+
+def prepare_polygon(polygon_rings: List) -> Optional[PreparedPolygon]:
+    """Build the reusable ray-casting form of a boundary; None if it can't contain anything"""
+    if not polygon_rings or not polygon_rings[0]:
+        return None
+    # Use first ring (exterior boundary)
+    edges = _prepare_ring_edges(polygon_rings[0])
+    if not edges:
+        return None
+    return PreparedPolygon(
+        edges=edges,
+        min_lat=min(e[4] for e in edges),
+        max_lat=max(e[5] for e in edges),
+        max_lon=max(e[6] for e in edges),
+        min_lon=min(p[0] for p in polygon_rings[0]),
+    )
 
-        features = data.get("features", [])
-        if not features:
-            logging.warning(f"No boundary found for tract {geoid}")
-            return None
+def points_in_prepared(points: List[Tuple[float, float]], prepared: Optional[PreparedPolygon]) -> List[bool]:
+    """Test (lon, lat) points against a prepared polygon; points outside its box skip the ring walk"""
+    if prepared is None:
+        return [False] * len(points)
+    edges, min_lat, max_lat, max_lon, _ = prepared
+    out = []
+    for point_lon, point_lat in points:
+        if point_lat <= min_lat or point_lat > max_lat or point_lon > max_lon:
+            out.append(False)
+        else:
+            out.append(_ray_cast(point_lon, point_lat, edges))
+    return out
 
-        # Extract polygon rings from first feature
-        geometry = features[0].get("geometry", {})
-        rings = geometry.get("rings", [])
+def points_in_polygon(points: List[Tuple[float, float]], polygon_rings: List) -> List[bool]:
+    """
+    Bulk version of point_in_polygon for many (lon, lat) points against one tract.
+    The polygon is prepared once per call.
+    """
+    return points_in_prepared(points, prepare_polygon(polygon_rings))
 
-        if not rings:
-            logging.warning(f"No rings in geometry for tract {geoid}")
-            return None
+def _prepared_tract(tract_geoid: str) -> Optional[PreparedPolygon]:
+    """Prepared form of a cached tract boundary (None if there isn't one), built on first use"""
+    prepared = _prepared_boundaries.get(tract_geoid, _MISSING)
+    if prepared is _MISSING:
+        prepared = prepare_polygon(_cache_get_tract_boundary(tract_geoid))
+        _prepared_boundaries.set(tract_geoid, prepared)
+    return prepared
 
-        # Cache and return
-        _cache_set_tract_boundary(geoid, rings)
-        return rings
+def points_in_tract(tract_geoid: str, points: List[Tuple[float, float]]) -> List[bool]:
+    """
+    Test (lon, lat) points against a cached tract boundary, reusing its prepared form.
+    A tract with no cached boundary contains nothing.
+    """
+    return points_in_prepared(points, _prepared_tract(tract_geoid))
 
-    except Exception as e:
-        logging.warning(f"Failed to fetch boundary for tract {geoid}: {e}")
-        return None
+def tracts_containing_point(point_lon: float, point_lat: float) -> List[str]:
+    """
+    GEOIDs of cached tracts whose boundary contains (lon, lat).
+    Only tracts whose bounding box shares the point's grid cell get the exact ray test.
+    """
+    candidates = _current_tract_grid().get(_grid_cell(point_lon, point_lat), ())
+    return sorted(g for g in candidates if points_in_tract(g, [(point_lon, point_lat)])[0])
 
 def point_in_polygon(point_lon: float, point_lat: float, polygon_rings: List) -> bool:
     """
     Check if a point is inside a polygon using ray casting algorithm.
     polygon_rings: list of rings, each ring is [[lon, lat], [lon, lat], ...]
     """
-    if not polygon_rings:
-        return False
-
-    # Use first ring (exterior boundary)
-    polygon = polygon_rings[0]
-
-    # Ray casting algorithm
-    inside = False
-    n = len(polygon)
-
-    p1_lon, p1_lat = polygon[0]
-
-    for i in range(1, n + 1):
-        p2_lon, p2_lat = polygon[i % n]
-
-        if point_lat > min(p1_lat, p2_lat):
-            if point_lat <= max(p1_lat, p2_lat):
-                if point_lon <= max(p1_lon, p2_lon):
-                    if p1_lat != p2_lat:
-                        x_intersection = (point_lat - p1_lat) * (p2_lon - p1_lon) / (p2_lat - p1_lat) + p1_lon
-                    if p1_lon == p2_lon or point_lon <= x_intersection:
-                        inside = not inside
-
-        p1_lon, p1_lat = p2_lon, p2_lat
-
-    return inside
+    return points_in_polygon([(point_lon, point_lat)], polygon_rings)[0]
 
 # === MARKET DATA (optional) ===
 
 def get_market_stats_for_zip(zip_code: str) -> Dict[str, Optional[int]]:
     if not zip_code:
         return {"median_days_on_market": None}
-    if zip_code in _dom_cache:
-        return {"median_days_on_market": _dom_cache[zip_code]}
-    if not (RAPIDAPI_KEY and RAPIDAPI_HOST and RAPIDAPI_TEST_URL):
-        _dom_cache[zip_code] = None
+    cached = _dom_cache.get(zip_code, _MISSING)
+    if cached is not _MISSING:
+        return {"median_days_on_market": cached}
+    if not CFG.rapidapi_configured:
+        _dom_cache.set(zip_code, None)
         return {"median_days_on_market": None}
 
     try:
@@ -1461,19 +1719,19 @@ def get_market_stats_for_zip(zip_code: str) -> Dict[str, Optional[int]]:
         }
         headers = {
             "Content-Type": "application/json",
-            "x-rapidapi-key": RAPIDAPI_KEY,
-            "x-rapidapi-host": RAPIDAPI_HOST,
+            "x-rapidapi-key": CFG.rapidapi_key,
+            "x-rapidapi-host": CFG.rapidapi_host,
         }
-        resp = requests.post(RAPIDAPI_TEST_URL, headers=headers, json=payload, timeout=REQUEST_TIMEOUT)
+        resp = _http.post(CFG.rapidapi_list_url, headers=headers, json=payload, timeout=REQUEST_TIMEOUT)
         if resp.status_code == 404:
-            _dom_cache[zip_code] = None
+            _dom_cache.set(zip_code, None)
             return {"median_days_on_market": None}
         if resp.status_code == 429:
             logging.warning("⚠️ RapidAPI rate limit exceeded for ZIP %s", zip_code)
-            _dom_cache[zip_code] = None
+            _dom_cache.set(zip_code, None)
             return {"median_days_on_market": None}
         resp.raise_for_status()
-        data = resp.json()
+        data = _json_loads(resp.content)
 
         days = []
         props = (data or {}).get("data", {}).get("home_search", {}).get("results", []) or []
@@ -1483,34 +1741,74 @@ def get_market_stats_for_zip(zip_code: str) -> Dict[str, Optional[int]]:
                 days.append(dom)
 
         if not days:
-            _dom_cache[zip_code] = None
+            _dom_cache.set(zip_code, None)
             return {"median_days_on_market": None}
 
-        days.sort()
-        median_dom = days[len(days)//2]
-        _dom_cache[zip_code] = int(median_dom)
+        # Upper median, so even-sized samples still yield an observed value
+        median_dom = statistics.median_high(days)
+        _dom_cache.set(zip_code, int(median_dom))
         return {"median_days_on_market": int(median_dom)}
     except Exception as e:
         logging.warning("Market data lookup failed for %s: %s", zip_code, e)
-        _dom_cache[zip_code] = None
+        _dom_cache.set(zip_code, None)
         return {"median_days_on_market": None}
 
+def get_market_stats_for_zips(zip_codes: List[str]) -> Dict[str, Dict[str, Optional[int]]]:
+    """Fetch market stats for several ZIPs concurrently; each distinct ZIP is looked up once"""
+    unique_zips = list(dict.fromkeys(z for z in zip_codes if z))
+    if not unique_zips:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(MARKET_LOOKUP_WORKERS, len(unique_zips))) as pool:
+        return dict(zip(unique_zips, pool.map(get_market_stats_for_zip, unique_zips)))
+
+@lru_cache(maxsize=4096)
 def get_zip_for_tract(county_fips: str, tract: str) -> Optional[str]:
     """Map census tracts to ZIP codes using Google Maps data"""
     t = (tract or "").zfill(6)
-    county_map = TRACT_TO_ZIP_MAPPING.get(county_fips, {})
-    return county_map.get(t)
+    key = _pack_tract_key(county_fips or "", t)
+    if key is None:
+        return None
+    i = bisect_left(_TRACT_ZIP_KEYS, key)
+    if i < len(_TRACT_ZIP_KEYS) and _TRACT_ZIP_KEYS[i] == key:
+        return str(_TRACT_ZIP_VALUES[i]).zfill(5)
+
+    # Marion only: fall back to the closest sibling tract under the same prefix
+    if county_fips == "097":
+        siblings = _MARION_ZIP_TRIE.get(t[:3])
+        if siblings:
+            suffix = int(t[3:])
+            nearest = min(siblings, key=lambda s: abs(int(s) - suffix))
+            return siblings[nearest]
+    return None
 
 # === SCORING ===
 
-def score_tract_flip_potential(tract: Dict[str, Any], price_min: int, price_max: int) -> Dict[str, Any]:
-    mhv = tract.get("median_home_value") or 0
-    income = tract.get("median_income") or 0
-    vacancy_pct = tract.get("vacancy_pct") or 0.0
-    dom = tract.get("days_on_market")
-    neighborhood = tract.get("neighborhood", "")
-    county_name = tract.get("county_name", "")
+def neighborhood_bonuses(neighborhood: str, county_name: str) -> Tuple[bool, float, Optional[float], float]:
+    """Neighborhood-level score bonuses: (has_starbucks, starbucks_bonus, school_rating, school_bonus)"""
+    # Starbucks bonus: +3 points for recent commercial investment
+    starbucks_bonus = 0.0
+    has_starbucks = has_recent_starbucks(neighborhood, county_name)
+    if has_starbucks:
+        starbucks_bonus = 3.0
 
+    # School ratings bonus: Critical for family buyers and resale value
+    school_bonus = 0.0
+    school_rating = NEIGHBORHOOD_SCHOOL_RATINGS.get(neighborhood)
+    if school_rating is not None:
+        if school_rating >= 8.0:
+            school_bonus = 5.0  # Excellent schools - major selling point
+        elif school_rating >= 7.0:
+            school_bonus = 3.0  # Good schools - strong advantage
+        elif school_rating >= 6.0:
+            school_bonus = 1.0  # Decent schools - slight advantage
+        elif school_rating <= 5.0:
+            school_bonus = -2.0  # Below average - harder to sell to families
+
+    return has_starbucks, starbucks_bonus, school_rating, school_bonus
+
+def flip_component_scores(mhv: float, income: float, vacancy_pct: float, dom: Optional[int],
+                          price_max: int) -> Tuple[float, float, float, float, float]:
+    """Numeric core of tract scoring: (gap_ratio, gap_score, vacancy_score, income_score, velocity_score)"""
     # Gap score
     gap_ratio = (mhv / price_max) if price_max > 0 else 0
     if mhv <= 0: gap_score = 0.0; gap_ratio = 0.0
@@ -1542,53 +1840,161 @@ def score_tract_flip_potential(tract: Dict[str, Any], price_min: int, price_max:
     else:
         velocity_score = 0.5
 
+    return gap_ratio, gap_score, vacancy_score, income_score, velocity_score
+
+# --- Insight/warning rules ---
+# Card messages, shared by the tract and group rule tables. Templates are str.format'ed with
+# the metrics namespace ({rating} is the pre-rendered school rating, {days} the DOM).
+MSG_EXCELLENT_SCHOOLS = "🎓 Excellent schools (rated {rating}/10) — major family appeal"
+MSG_GOOD_SCHOOLS = "🎓 Good schools (rated {rating}/10) — strong for families"
+MSG_WEAK_SCHOOLS = "⚠️ Below-average schools (rated {rating}/10) — may limit buyer pool"
+MSG_STARBUCKS = "⭐ New Starbucks opened (2024-2025) — strong retail investment"
+MSG_STRONG_PROFIT = "💰 Strong profit potential in this price range"
+MSG_THIN_MARGIN = "⚠️ Limited profit margin"
+MSG_ABOVE_BUDGET = "⚠️ Median value significantly above budget"
+MSG_HEALTHY_INVENTORY = "✓ Healthy inventory levels"
+MSG_LOW_INVENTORY = "⚠️ Limited inventory availability"
+MSG_HIGH_VACANCY = "⚠️ High vacancy may indicate market weakness"
+MSG_STRONG_INCOME = "✓ Strong buyer income for resale"
+MSG_WEAK_INCOME = "⚠️ Income levels may limit buyer pool"
+MSG_FAST_MARKET = "⚡ Fast-moving market (~{days} days)"
+MSG_SLOW_MARKET = "⚠️ Slower market (~{days} days to sell)"
+
+# Each chain is checked in order and contributes at most one message (its first matching rule).
+# Rules are (predicate, bucket, template).
+MessageRule = Tuple[Callable[[SimpleNamespace], bool], str, str]
+
+TRACT_MESSAGE_RULES: Tuple[Tuple[MessageRule, ...], ...] = (
+    # School rating insights (high priority for family buyers)
+    (
+        (lambda m: bool(m.school_rating) and m.school_rating >= 8.0, "insights", MSG_EXCELLENT_SCHOOLS),
+        (lambda m: bool(m.school_rating) and m.school_rating >= 7.0, "insights", MSG_GOOD_SCHOOLS),
+        (lambda m: bool(m.school_rating) and m.school_rating <= 5.0, "warnings", MSG_WEAK_SCHOOLS),
+    ),
+    ((lambda m: m.has_starbucks, "insights", MSG_STARBUCKS),),
+    (
+        (lambda m: 1.3 <= m.gap_ratio <= 1.4, "insights", MSG_STRONG_PROFIT),
+        (lambda m: m.gap_ratio < 1.1, "warnings", MSG_THIN_MARGIN),
+        (lambda m: m.gap_ratio > 1.7, "warnings", MSG_ABOVE_BUDGET),
+    ),
+    (
+        (lambda m: 10 <= m.vacancy_pct <= 13, "insights", MSG_HEALTHY_INVENTORY),
+        (lambda m: m.vacancy_pct < 5, "warnings", MSG_LOW_INVENTORY),
+        (lambda m: m.vacancy_pct > 20, "warnings", MSG_HIGH_VACANCY),
+    ),
+    (
+        (lambda m: m.income >= m.mhv / 3.5, "insights", MSG_STRONG_INCOME),
+        (lambda m: m.income < m.mhv / 4.5, "warnings", MSG_WEAK_INCOME),
+    ),
+    (
+        (lambda m: bool(m.days) and m.days < 40, "insights", MSG_FAST_MARKET),
+        (lambda m: bool(m.days) and m.days > 90, "warnings", MSG_SLOW_MARKET),
+    ),
+)
+
+# Group cards use aggregated metrics, so vacancy uses the wider 8-15% band and income a ratio
+GROUP_MESSAGE_RULES: Tuple[Tuple[MessageRule, ...], ...] = (
+    (
+        (lambda m: bool(m.school_rating) and m.school_rating >= 8.0, "insights", MSG_EXCELLENT_SCHOOLS),
+        (lambda m: bool(m.school_rating) and m.school_rating >= 7.0, "insights", MSG_GOOD_SCHOOLS),
+        (lambda m: bool(m.school_rating) and m.school_rating <= 5.0, "warnings", MSG_WEAK_SCHOOLS),
+    ),
+    ((lambda m: m.has_starbucks, "insights", MSG_STARBUCKS),),
+    (
+        (lambda m: m.gap_ratio is not None and 1.3 <= m.gap_ratio <= 1.4, "insights", MSG_STRONG_PROFIT),
+        (lambda m: m.gap_ratio is not None and m.gap_ratio < 1.1, "warnings", MSG_THIN_MARGIN),
+        (lambda m: m.gap_ratio is not None and m.gap_ratio > 1.7, "warnings", MSG_ABOVE_BUDGET),
+    ),
+    (
+        (lambda m: m.vacancy_pct is not None and 8.0 <= m.vacancy_pct <= 15.0, "insights", MSG_HEALTHY_INVENTORY),
+        (lambda m: m.vacancy_pct is not None and m.vacancy_pct < 5.0, "warnings", MSG_LOW_INVENTORY),
+        (lambda m: m.vacancy_pct is not None and m.vacancy_pct > 20.0, "warnings", MSG_HIGH_VACANCY),
+    ),
+    (
+        (lambda m: m.income_ratio is not None and m.income_ratio >= 1.0, "insights", MSG_STRONG_INCOME),
+        (lambda m: m.income_ratio is not None and m.income_ratio < 0.8, "warnings", MSG_WEAK_INCOME),
+    ),
+    (
+        (lambda m: m.dom is not None and m.dom < 40, "insights", MSG_FAST_MARKET),
+        (lambda m: m.dom is not None and m.dom > 90, "warnings", MSG_SLOW_MARKET),
+    ),
+)
+
+GROUP_MESSAGE_LIMIT = 3  # insights/warnings shown per neighborhood card
+
+def apply_message_rules(rules: Tuple[Tuple[MessageRule, ...], ...], metrics: SimpleNamespace,
+                        limit: Optional[int] = None) -> Tuple[List[str], List[str]]:
+    """
+    Run rule chains against metrics; returns (insights, warnings) in rule order.
+    With limit, each list keeps its first `limit` messages (same as slicing afterwards), but
+    messages for a full list are never formatted and evaluation stops once both are full.
+    """
+    insights: List[str] = []
+    warnings: List[str] = []
+    values = vars(metrics)
+    for chain in rules:
+        if limit is not None and len(insights) >= limit and len(warnings) >= limit:
+            break
+        for predicate, bucket, template in chain:
+            if predicate(metrics):
+                target = insights if bucket == "insights" else warnings
+                if limit is None or len(target) < limit:
+                    # Fixed messages are appended as-is (the shared module constant)
+                    target.append(template.format_map(values) if "{" in template else template)
+                break
+    return insights, warnings
+
+def group_message_metrics(med_home_val: Optional[float], med_income: Optional[float], vac_pct: Optional[float],
+                          dom: Optional[float], gap_ratio: Optional[float], has_starbucks: bool,
+                          school_rating: Optional[float]) -> SimpleNamespace:
+    """Metrics namespace for GROUP_MESSAGE_RULES"""
+    income_ratio = None
+    if med_home_val and med_income:
+        ideal_income = med_home_val / 3.5
+        income_ratio = (med_income / ideal_income) if ideal_income else 0
+    return SimpleNamespace(
+        school_rating=school_rating, has_starbucks=has_starbucks, gap_ratio=gap_ratio,
+        vacancy_pct=vac_pct, income_ratio=income_ratio, dom=dom,
+        rating=format(school_rating, ".1f") if school_rating is not None else None,
+        days=int(dom) if dom is not None else None,
+    )
+
+def group_card_messages(group: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+    """(insights, warnings) for an aggregated neighborhood card, from its response fields"""
+    return apply_message_rules(GROUP_MESSAGE_RULES, group_message_metrics(
+        group.get("median_home_value"), group.get("median_income"), group.get("vacancy_pct"),
+        group.get("days_on_market"), group.get("gap_ratio"), group.get("has_starbucks", False),
+        group.get("school_rating"),
+    ), limit=GROUP_MESSAGE_LIMIT)
+
+def score_tract_flip_potential(tract: Dict[str, Any], price_min: int, price_max: int,
+                               bonuses: Optional[Tuple[bool, float, Optional[float], float]] = None) -> Dict[str, Any]:
+    mhv = tract.get("median_home_value") or 0
+    income = tract.get("median_income") or 0
+    vacancy_pct = tract.get("vacancy_pct") or 0.0
+    dom = tract.get("days_on_market")
+    neighborhood = tract.get("neighborhood", "")
+    county_name = tract.get("county_name", "")
+
+    gap_ratio, gap_score, vacancy_score, income_score, velocity_score = flip_component_scores(
+        mhv, income, vacancy_pct, dom, price_max
+    )
+
     # Base score calculation
     total = 0.50*gap_score + 0.20*vacancy_score + 0.20*income_score + 0.10*velocity_score
 
-    # Starbucks bonus: +3 points for recent commercial investment
-    starbucks_bonus = 0.0
-    has_starbucks = has_recent_starbucks(neighborhood, county_name)
-    if has_starbucks:
-        starbucks_bonus = 3.0
-
-    # School ratings bonus: Critical for family buyers and resale value
-    school_bonus = 0.0
-    school_rating = NEIGHBORHOOD_SCHOOL_RATINGS.get(neighborhood)
-    if school_rating is not None:
-        if school_rating >= 8.0:
-            school_bonus = 5.0  # Excellent schools - major selling point
-        elif school_rating >= 7.0:
-            school_bonus = 3.0  # Good schools - strong advantage
-        elif school_rating >= 6.0:
-            school_bonus = 1.0  # Decent schools - slight advantage
-        elif school_rating <= 5.0:
-            school_bonus = -2.0  # Below average - harder to sell to families
+    # Starbucks + school bonuses (shared by every tract in a neighborhood)
+    if bonuses is None:
+        bonuses = neighborhood_bonuses(neighborhood, county_name)
+    has_starbucks, starbucks_bonus, school_rating, school_bonus = bonuses
 
     # Cap final score at 100 for consistency
     total_score = min(100.0, round((total * 100) + starbucks_bonus + school_bonus, 1))
 
-    insights, warnings = [], []
-
-    # School rating insights (high priority for family buyers)
-    if school_rating and school_rating >= 8.0:
-        insights.append(f"🎓 Excellent schools (rated {school_rating}/10) — major family appeal")
-    elif school_rating and school_rating >= 7.0:
-        insights.append(f"🎓 Good schools (rated {school_rating}/10) — strong for families")
-    elif school_rating and school_rating <= 5.0:
-        warnings.append(f"⚠️ Below-average schools (rated {school_rating}/10) — may limit buyer pool")
-
-    if has_starbucks:
-        insights.append("⭐ New Starbucks opened (2024-2025) — strong retail investment")
-    if 1.3 <= gap_ratio <= 1.4: insights.append("💰 Strong profit potential in this price range")
-    elif gap_ratio < 1.1: warnings.append("⚠️ Limited profit margin")
-    elif gap_ratio > 1.7: warnings.append("⚠️ Median value significantly above budget")
-    if 10 <= vacancy_pct <= 13: insights.append("✓ Healthy inventory levels")
-    elif vacancy_pct < 5: warnings.append("⚠️ Limited inventory availability")
-    elif vacancy_pct > 20: warnings.append("⚠️ High vacancy may indicate market weakness")
-    if income >= mhv/3.5: insights.append("✓ Strong buyer income for resale")
-    elif income < mhv/4.5: warnings.append("⚠️ Income levels may limit buyer pool")
-    if dom and dom < 40: insights.append(f"⚡ Fast-moving market (~{dom} days)")
-    elif dom and dom > 90: warnings.append(f"⚠️ Slower market (~{dom} days to sell)")
+    insights, warnings = apply_message_rules(TRACT_MESSAGE_RULES, SimpleNamespace(
+        school_rating=school_rating, has_starbucks=has_starbucks, gap_ratio=gap_ratio,
+        vacancy_pct=vacancy_pct, income=income, mhv=mhv, days=dom, rating=school_rating,
+    ))
 
     return {
         "score": total_score,
@@ -1605,30 +2011,43 @@ def score_tract_flip_potential(tract: Dict[str, Any], price_min: int, price_max:
         "warnings": warnings,
     }
 
-# === GROUP AGGREGATION ===
+def score_tracts(tracts: List[Dict[str, Any]], price_min: int, price_max: int) -> None:
+    """Score every tract in one pass, in place; neighborhood bonuses are looked up once per neighborhood"""
+    bonus_cache: Dict[Tuple[str, str], Tuple[bool, float, Optional[float], float]] = {}
+    for tract in tracts:
+        key = (tract.get("neighborhood", ""), tract.get("county_name", ""))
+        bonuses = bonus_cache.get(key)
+        if bonuses is None:
+            bonuses = bonus_cache[key] = neighborhood_bonuses(*key)
+        tract.update(score_tract_flip_potential(tract, price_min, price_max, bonuses=bonuses))
 
-def pop_weighted_avg(values: List[Tuple[Optional[float], int]]) -> Optional[float]:
-    num = 0.0
-    den = 0
-    for v, w in values:
-        if v is None: continue
-        num += float(v) * int(w or 0)
-        den += int(w or 0)
-    if den == 0: return None
-    return num / den
+# === GROUP AGGREGATION ===
 
-def aggregate_group(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
-    total_pop = sum(int(r.get("total_pop") or 0) for r in rows)
-    med_home_val = pop_weighted_avg([(r.get("median_home_value"), r.get("total_pop") or 0) for r in rows])
-    med_income   = pop_weighted_avg([(r.get("median_income"), r.get("total_pop") or 0) for r in rows])
-    vac_pct      = pop_weighted_avg([(r.get("vacancy_pct"), r.get("total_pop") or 0) for r in rows])
+GROUP_AVG_KEYS = ("median_home_value", "median_income", "vacancy_pct", "days_on_market", "gap_ratio", "score")
 
-    # Only aggregate DOM if at least one tract in group has it
-    dom_values = [(r.get("days_on_market"), r.get("total_pop") or 0) for r in rows if r.get("days_on_market") is not None]
-    dom = pop_weighted_avg(dom_values) if dom_values else None
+def pop_weighted_avgs(rows: List[Dict[str, Any]], keys: Tuple[str, ...]) -> Tuple[int, List[Optional[float]]]:
+    """
+    Population-weighted average of each key over rows, in one pass.
+    Rows missing a key don't count toward that key's weight; a key with no weight averages to None.
+    Returns (total_pop, averages in keys order).
+    """
+    n = len(keys)
+    nums = [0.0] * n
+    dens = [0] * n
+    total_pop = 0
+    for r in rows:
+        w = int(r.get("total_pop") or 0)
+        total_pop += w
+        for i, k in enumerate(keys):
+            v = r.get(k)
+            if v is None: continue
+            nums[i] += float(v) * w
+            dens[i] += w
+    return total_pop, [(nums[i] / dens[i]) if dens[i] else None for i in range(n)]
 
-    gap_ratio    = pop_weighted_avg([(r.get("gap_ratio"), r.get("total_pop") or 0) for r in rows])
-    area_score   = pop_weighted_avg([(r.get("score"), r.get("total_pop") or 0) for r in rows])
+def aggregate_group(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # DOM only averages over tracts that have it (others are skipped like any missing value)
+    total_pop, (med_home_val, med_income, vac_pct, dom, gap_ratio, area_score) = pop_weighted_avgs(rows, GROUP_AVG_KEYS)
 
     # Check if any tract in the group has Starbucks (should be consistent across group)
     has_starbucks = any(r.get("has_starbucks", False) for r in rows)
@@ -1640,54 +2059,10 @@ def aggregate_group(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
         school_rating = sum(school_ratings) / len(school_ratings)  # Average if slightly different
 
     # 👉 Derive messages from the aggregated metrics (not by unioning tract messages)
-    insights: List[str] = []
-    warnings: List[str] = []
-
-    # School rating insights (high priority for family buyers)
-    if school_rating and school_rating >= 8.0:
-        insights.append(f"🎓 Excellent schools (rated {school_rating:.1f}/10) — major family appeal")
-    elif school_rating and school_rating >= 7.0:
-        insights.append(f"🎓 Good schools (rated {school_rating:.1f}/10) — strong for families")
-    elif school_rating and school_rating <= 5.0:
-        warnings.append(f"⚠️ Below-average schools (rated {school_rating:.1f}/10) — may limit buyer pool")
-
-    # Starbucks indicator
-    if has_starbucks:
-        insights.append("⭐ New Starbucks opened (2024-2025) — strong retail investment")
-
-    if gap_ratio is not None:
-        if 1.3 <= gap_ratio <= 1.4:
-            insights.append("💰 Strong profit potential in this price range")
-        elif gap_ratio < 1.1:
-            warnings.append("⚠️ Limited profit margin")
-        elif gap_ratio > 1.7:
-            warnings.append("⚠️ Median value significantly above budget")
-
-    if vac_pct is not None:
-        if 8.0 <= vac_pct <= 15.0:
-            insights.append("✓ Healthy inventory levels")
-        elif vac_pct < 5.0:
-            warnings.append("⚠️ Limited inventory availability")
-        elif vac_pct > 20.0:
-            warnings.append("⚠️ High vacancy may indicate market weakness")
-
-    if med_home_val and med_income:
-        ideal_income = med_home_val / 3.5
-        ratio = (med_income / ideal_income) if ideal_income else 0
-        if ratio >= 1.0:
-            insights.append("✓ Strong buyer income for resale")
-        elif ratio < 0.8:
-            warnings.append("⚠️ Income levels may limit buyer pool")
-
-    if dom is not None:
-        if dom < 40:
-            insights.append(f"⚡ Fast-moving market (~{int(dom)} days)")
-        elif dom > 90:
-            warnings.append(f"⚠️ Slower market (~{int(dom)} days to sell)")
-
-    # Keep cards concise
-    insights = insights[:3]
-    warnings = warnings[:3]
+    # Keep cards concise: at most GROUP_MESSAGE_LIMIT of each
+    insights, warnings = apply_message_rules(GROUP_MESSAGE_RULES, group_message_metrics(
+        med_home_val, med_income, vac_pct, dom, gap_ratio, has_starbucks, school_rating
+    ), limit=GROUP_MESSAGE_LIMIT)
 
     members = [{
         "tract_id": r.get("tract_id"),
@@ -1696,7 +2071,9 @@ def aggregate_group(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
     } for r in rows]
 
     # Select primary tract for boundary filtering (highest score)
-    primary_tract = max(rows, key=lambda r: r.get("score", 0)) if rows else {}
+    # max()/index() run in C; index() returns the first top score, matching max(rows, key=...)
+    scores = [r.get("score", 0) for r in rows]
+    primary_tract = rows[scores.index(max(scores))] if rows else {}
 
     return {
         "median_home_value": round(med_home_val, 1) if med_home_val is not None else None,
@@ -1725,11 +2102,30 @@ CORS_HEADERS = {
     "Access-Control-Allow-Headers": "Content-Type",
 }
 
+# CORS preflight answer, built once; Max-Age lets browsers skip repeat preflights for a day.
+# The worker only reads responses, so one instance is safe to return from every request.
+_OPTIONS_RESPONSE = func.HttpResponse(
+    status_code=200,
+    headers={**CORS_HEADERS, "Access-Control-Max-Age": "86400"},
+)
+
 def _to_bool(v: Optional[str], default: bool=False) -> bool:
     if v is None:
         return default
     return str(v).strip().lower() in ("1","true","yes","y","on")
 
+# Large JSON bodies (grouped analyze results with member tracts) are gzipped for clients that accept it
+GZIP_MIN_BYTES = 4096
+
+def _json_response(req: func.HttpRequest, payload: Any, pretty: bool = False) -> func.HttpResponse:
+    """Serialize payload straight to bytes; gzip the body when it is large and the client accepts gzip"""
+    body = _json_dumps(payload, pretty=pretty)
+    headers = CORS_HEADERS
+    if len(body) >= GZIP_MIN_BYTES and "gzip" in (req.headers.get("Accept-Encoding") or "").lower():
+        body = gzip.compress(body, compresslevel=5)
+        headers = {**CORS_HEADERS, "Content-Encoding": "gzip", "Vary": "Accept-Encoding"}
+    return func.HttpResponse(body, mimetype="application/json", headers=headers)
+
 @app.route(route="health", methods=["GET"])
 def health_check(req: func.HttpRequest) -> func.HttpResponse:
     return func.HttpResponse(
@@ -1745,14 +2141,14 @@ def health_check(req: func.HttpRequest) -> func.HttpResponse:
 @app.route(route="analyze", methods=["GET", "POST", "OPTIONS"])
 def analyze_neighborhoods(req: func.HttpRequest) -> func.HttpResponse:
     if req.method == "OPTIONS":
-        return func.HttpResponse(status_code=200, headers=CORS_HEADERS)
+        return _OPTIONS_RESPONSE
     logging.info("🚀 Starting neighborhood analysis")
 
     try:
         # ---- inputs (robust) ----
         top_n = max(1, min(int(req.params.get("top", "50")), 50))
-        price_min = int(req.params.get("price_min", DEFAULT_PRICE_MIN))
-        price_max = int(req.params.get("price_max", DEFAULT_PRICE_MAX))
+        price_min = int(req.params.get("price_min", CFG.price_min))
+        price_max = int(req.params.get("price_max", CFG.price_max))
         if price_min > price_max:
             price_min, price_max = price_max, price_min
         min_score = float(req.params.get("min_score", "0"))
@@ -1783,103 +2179,79 @@ def analyze_neighborhoods(req: func.HttpRequest) -> func.HttpResponse:
 
         max_market_lookups = min(int(req.params.get("max_market_lookups", MAX_MARKET_LOOKUPS_DEFAULT)), 50)
 
-        # ---- fetch ACS across counties ----
+        # Ops escape hatch: ?refresh=1 refetches ACS instead of serving it from cache
+        refresh = _to_bool(req.params.get("refresh"), False)
+        # Compact JSON unless ?pretty=1 (for reading responses by hand)
+        pretty = _to_bool(req.params.get("pretty"), False)
+
+        # ---- fetch ACS across counties (one batched call) ----
         all_tracts: List[Dict[str, Any]] = []
         errors: List[str] = []
-        for county_name, county_fips in CENTRAL_IN_COUNTIES.items():
-            data = fetch_census_data_with_retry(county_name, county_fips)
+        for county_name, data in fetch_census_data_batch(CENTRAL_IN_COUNTIES, refresh=refresh).items():
             if data is None:
                 errors.append(f"Failed to fetch {county_name} after retries")
                 continue
+            all_tracts.extend(acs_rows_to_tracts(county_name, data))
 
-            headers = data[0]; rows = data[1:]
-            for row in rows:
-                rec = dict(zip(headers, row))
-                total_housing = safe_int(rec.get("B25001_001E"))
-                vacant = safe_int(rec.get("B25002_003E"))
-                vacancy_pct = 0.0
-                if total_housing and vacant is not None and total_housing > 0:
-                    vacancy_pct = (vacant / total_housing) * 100.0
-
-                tract = rec.get("tract")
-                item: Dict[str, Any] = {
-                    "state": rec.get("state"),
-                    "county": rec.get("county"),
-                    "tract": tract,
-                    "county_name": county_name,
-                    "neighborhood": neighborhood_label(county_name, tract),
-                    "tract_id": tract_id_human(tract or ""),
-                    "total_pop": safe_int(rec.get("B01003_001E")),
-                    "housing_units": total_housing,
-                    "housing_vacant": vacant,
-                    "vacancy_pct": round(vacancy_pct, 1),
-                    "median_home_value": safe_int(rec.get("B25077_001E")),
-                    "median_income": safe_int(rec.get("B19013_001E")),
-                    "median_gross_rent": safe_int(rec.get("B25064_001E")),
-                }
-                item.update(score_tract_flip_potential(item, price_min=price_min, price_max=price_max))
-                all_tracts.append(item)
-
-        all_tracts.sort(key=lambda x: x["score"], reverse=True)
+        score_tracts(all_tracts, price_min=price_min, price_max=price_max)
         filtered = [t for t in all_tracts if (t.get("score") or 0) >= min_score]
 
         if not do_group:
-            top_ops = filtered[:top_n]
-            return func.HttpResponse(json.dumps({
+            # Only top_n are returned, so select them instead of sorting everything (same tie order)
+            top_ops = heapq.nlargest(top_n, filtered, key=lambda x: x["score"])
+            return _json_response(req, {
                 "status": "success",
                 "total_tracts_analyzed": len(all_tracts),
                 "rehab_budget_used": rehab_budget,
                 "opportunities": top_ops,
                 "summary": {
                     "top_score": top_ops[0]["score"] if top_ops else 0,
-                    "avg_score": round(sum(t["score"] for t in filtered)/len(filtered), 1) if filtered else 0,
+                    "avg_score": round(statistics.fmean([t["score"] for t in filtered]), 1) if filtered else 0,
                     "total_meeting_criteria": len(filtered),
                 },
-                "market_data_enabled": bool(include_market_data and RAPIDAPI_KEY),
+                "market_data_enabled": bool(include_market_data and CFG.rapidapi_key),
                 "price_band_used": {"min": price_min, "max": price_max},
                 "errors": errors or None,
-            }, indent=2), mimetype="application/json", headers=CORS_HEADERS)
+            }, pretty=pretty)
 
-        # group by neighborhood
-        groups: Dict[str, List[Dict[str, Any]]] = {}
+        # group by neighborhood (in score order, which also orders groups with equal scores)
+        filtered.sort(key=lambda x: x["score"], reverse=True)
+        groups: Dict[Tuple[str, str], List[Dict[str, Any]]] = defaultdict(list)
         for t in filtered:
-            key = f"{t.get('county_name')}|{t.get('neighborhood')}"
-            groups.setdefault(key, []).append(t)
-
-        print("\n" + "="*70)
-        print(f"📊 NEIGHBORHOOD GROUPING BREAKDOWN")
-        print("="*70)
-        print(f"Total tracts analyzed: {len(all_tracts)}")
-        print(f"Tracts after filtering: {len(filtered)}")
-        print(f"Number of neighborhood groups created: {len(groups)}")
-
-        # Show tract code distribution for Marion County to help debug
-        marion_tracts = [t for t in filtered if t.get('county_name') == 'Marion']
-        if marion_tracts:
-            tract_codes = sorted([int(t.get('tract', '0').zfill(6)[:2]) for t in marion_tracts if t.get('tract')])
-            print(f"\nMarion County tract code distribution ({len(marion_tracts)} tracts):")
-            print(f"  Min tract code: {min(tract_codes) if tract_codes else 'N/A'}")
-            print(f"  Max tract code: {max(tract_codes) if tract_codes else 'N/A'}")
-            from collections import Counter
-            code_counts = Counter(tract_codes)
-            print(f"  Tract codes present: {sorted(code_counts.keys())}")
-
-        print("\nNeighborhoods found:")
-        for key in sorted(groups.keys()):
-            county, neigh = key.split("|", 1)
-            tract_count = len(groups[key])
-            avg_score = sum(t.get('score', 0) for t in groups[key]) / tract_count if tract_count > 0 else 0
-            print(f"  • {neigh} ({county}): {tract_count} tracts, avg score: {avg_score:.1f}")
-        print("="*70 + "\n")
-
-        logging.info(f"📊 Grouped {len(filtered)} tracts into {len(groups)} neighborhoods:")
-        for key in sorted(groups.keys()):
-            county, neigh = key.split("|", 1)
-            logging.info(f"  • {neigh} ({county}): {len(groups[key])} tracts")
+            groups[(t.get("county_name"), t.get("neighborhood"))].append(t)
+
+        if CFG.debug_breakdown:
+            print("\n" + "="*70)
+            print(f"📊 NEIGHBORHOOD GROUPING BREAKDOWN")
+            print("="*70)
+            print(f"Total tracts analyzed: {len(all_tracts)}")
+            print(f"Tracts after filtering: {len(filtered)}")
+            print(f"Number of neighborhood groups created: {len(groups)}")
+
+            # Show tract code distribution for Marion County to help debug
+            marion_tracts = [t for t in filtered if t.get('county_name') == 'Marion']
+            if marion_tracts:
+                tract_codes = sorted([int(t.get('tract', '0').zfill(6)[:2]) for t in marion_tracts if t.get('tract')])
+                print(f"\nMarion County tract code distribution ({len(marion_tracts)} tracts):")
+                print(f"  Min tract code: {min(tract_codes) if tract_codes else 'N/A'}")
+                print(f"  Max tract code: {max(tract_codes) if tract_codes else 'N/A'}")
+                code_counts = Counter(tract_codes)
+                print(f"  Tract codes present: {sorted(code_counts.keys())}")
+
+            print("\nNeighborhoods found:")
+            for (county, neigh), rows in sorted(groups.items()):
+                tract_count = len(rows)
+                avg_score = sum(t.get('score', 0) for t in rows) / tract_count if tract_count > 0 else 0
+                print(f"  • {neigh} ({county}): {tract_count} tracts, avg score: {avg_score:.1f}")
+            print("="*70 + "\n")
+
+        logging.info(f"📊 Grouped {len(filtered)} tracts into {len(groups)} neighborhoods")
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            for (county, neigh), rows in sorted(groups.items()):
+                logging.debug(f"  • {neigh} ({county}): {len(rows)} tracts")
 
         neighborhoods: List[Dict[str, Any]] = []
-        for key, rows in groups.items():
-            county_name, neigh = key.split("|", 1)
+        for (county_name, neigh), rows in groups.items():
             agg = aggregate_group(rows)
             agg.update({"county_name": county_name, "neighborhood": neigh})
 
@@ -1890,11 +2262,11 @@ def analyze_neighborhoods(req: func.HttpRequest) -> func.HttpResponse:
 
             zips = [r.get("zip_code") for r in rows if r.get("zip_code")]
             if not zips:
-                guesses = [get_zip_for_tract(r.get("county"), r.get("tract")) for r in rows]
-                guesses = [g for g in guesses if g]
+                guesses = Counter(filter(None, (get_zip_for_tract(r.get("county"), r.get("tract")) for r in rows)))
                 if guesses:
-                    guess = max(set(guesses), key=guesses.count)
-                    conf = guesses.count(guess) / max(1, len(guesses))
+                    # Ties go to the ZIP seen first, so the guess no longer depends on set order
+                    guess, count = guesses.most_common(1)[0]
+                    conf = count / guesses.total()
                     agg["zip_guess"] = guess
                     agg["zip_confidence"] = round(conf, 3)
             neighborhoods.append(agg)
@@ -1903,26 +2275,36 @@ def analyze_neighborhoods(req: func.HttpRequest) -> func.HttpResponse:
 
         # Fetch market data for TOP neighborhoods after grouping (much more efficient!)
         rate_limit_hit = False
-        if include_market_data and RAPIDAPI_KEY and neighborhoods:
+        if include_market_data and CFG.rapidapi_key and neighborhoods:
             # Limit to top neighborhoods to avoid timeout
             fetch_limit = min(max_market_lookups, len(neighborhoods), 15)
             logging.info(f"🔍 Fetching market data for top {fetch_limit} neighborhoods...")
             looked = 0
 
+            targets = []
             for neighborhood in neighborhoods[:fetch_limit]:
+                # Try to get ZIP from member tracts or guess
+                zip_code = neighborhood.get("zip_guess")
+                if not zip_code:
+                    # Get ZIP from first member tract
+                    members = neighborhood.get("member_tracts", [])
+                    if members and members[0].get("zip_code"):
+                        zip_code = members[0]["zip_code"]
+                if zip_code:
+                    targets.append((neighborhood, zip_code))
+
+            # Fetch all ZIPs concurrently (bounded by MARKET_LOOKUP_WORKERS)
+            try:
+                market_by_zip = get_market_stats_for_zips([zip_code for _, zip_code in targets])
+            except Exception as e:
+                if "429" in str(e):
+                    rate_limit_hit = True
+                logging.warning(f"  ✗ Failed to fetch market data: {e}")
+                market_by_zip = {}
+
+            for neighborhood, zip_code in targets:
                 try:
-                    # Try to get ZIP from member tracts or guess
-                    zip_code = neighborhood.get("zip_guess")
-                    if not zip_code:
-                        # Get ZIP from first member tract
-                        members = neighborhood.get("member_tracts", [])
-                        if members and members[0].get("zip_code"):
-                            zip_code = members[0]["zip_code"]
-
-                    if not zip_code:
-                        continue
-
-                    market_stats = get_market_stats_for_zip(zip_code)
+                    market_stats = market_by_zip.get(zip_code)
                     dom = market_stats.get("median_days_on_market") if market_stats else None
 
                     if dom is not None:
@@ -1931,53 +2313,7 @@ def analyze_neighborhoods(req: func.HttpRequest) -> func.HttpResponse:
                         logging.info(f"  ✓ {neighborhood.get('neighborhood')} (ZIP {zip_code}): {dom} days")
 
                         # Recalculate insights/warnings with DOM included
-                        gap_ratio = neighborhood.get("gap_ratio")
-                        vac_pct = neighborhood.get("vacancy_pct")
-                        med_home_val = neighborhood.get("median_home_value")
-                        med_income = neighborhood.get("median_income")
-                        has_starbucks = neighborhood.get("has_starbucks", False)
-
-                        insights = []
-                        warnings = []
-
-                        # Preserve Starbucks indicator (comes first for visibility)
-                        if has_starbucks:
-                            insights.append("⭐ New Starbucks opened (2024-2025) — strong retail investment")
-
-                        if gap_ratio is not None:
-                            if 1.3 <= gap_ratio <= 1.4:
-                                insights.append("💰 Strong profit potential in this price range")
-                            elif gap_ratio < 1.1:
-                                warnings.append("⚠️ Limited profit margin")
-                            elif gap_ratio > 1.7:
-                                warnings.append("⚠️ Median value significantly above budget")
-
-                        if vac_pct is not None:
-                            if 8.0 <= vac_pct <= 15.0:
-                                insights.append("✓ Healthy inventory levels")
-                            elif vac_pct < 5.0:
-                                warnings.append("⚠️ Limited inventory availability")
-                            elif vac_pct > 20.0:
-                                warnings.append("⚠️ High vacancy may indicate market weakness")
-
-                        if med_home_val and med_income:
-                            ideal_income = med_home_val / 3.5
-                            ratio = (med_income / ideal_income) if ideal_income else 0
-                            if ratio >= 1.0:
-                                insights.append("✓ Strong buyer income for resale")
-                            elif ratio < 0.8:
-                                warnings.append("⚠️ Income levels may limit buyer pool")
-
-                        # DOM insights
-                        if dom < 40:
-                            insights.append(f"⚡ Fast-moving market (~{int(dom)} days)")
-                        elif dom > 90:
-                            warnings.append(f"⚠️ Slower market (~{int(dom)} days to sell)")
-
-                        neighborhood["insights"] = insights[:3]
-                        neighborhood["warnings"] = warnings[:3]
-
-                    time.sleep(0.15)  # Rate limit protection
+                        neighborhood["insights"], neighborhood["warnings"] = group_card_messages(neighborhood)
 
                 except Exception as e:
                     error_msg = str(e)
@@ -2000,15 +2336,15 @@ def analyze_neighborhoods(req: func.HttpRequest) -> func.HttpResponse:
             "grouped_by_neighborhood": True,
             "summary": {
                 "top_score": top_areas[0]["score"] if top_areas else 0,
-                "avg_score": round(sum(a["score"] for a in neighborhoods)/len(neighborhoods), 1) if neighborhoods else 0,
+                "avg_score": round(statistics.fmean([a["score"] for a in neighborhoods]), 1) if neighborhoods else 0,
                 "total_meeting_criteria": len(neighborhoods),
             },
-            "market_data_enabled": bool(include_market_data and RAPIDAPI_KEY),
+            "market_data_enabled": bool(include_market_data and CFG.rapidapi_key),
             "price_band_used": {"min": price_min, "max": price_max},
             "errors": errors or None,
         }
         logging.info("✅ Analysis complete, returning %d neighborhoods", len(top_areas))
-        return func.HttpResponse(json.dumps(result, indent=2), mimetype="application/json", headers=CORS_HEADERS)
+        return _json_response(req, result, pretty=pretty)
 
     except Exception as e:
         logging.exception("❌ Analysis failed")
@@ -2017,6 +2353,144 @@ def analyze_neighborhoods(req: func.HttpRequest) -> func.HttpResponse:
             status_code=500, mimetype="application/json", headers=CORS_HEADERS
         )
         
+def fetch_listings_data(zip_code: str, cache_key: str, limit: int, price_max: Optional[int],
+                        arv: Optional[int], discount: float, neighborhood: str = "",
+                        location_id_data: Optional[dict] = None) -> Any:
+    """Fetch and summarize RapidAPI listings for a ZIP; returns the listings data, or an HttpResponse to send as-is"""
+    # Call RapidAPI provider
+    # Build payload - prefer location ID if we have it, otherwise use postal_code
+    payload = {
+        "limit": max(25, limit),
+        "offset": 0,
+        "status": ["for_sale", "under_contract"],
+        "sort": {"direction": "desc", "field": "list_date"},
+    }
+
+    # Use postal_code for filtering (neighborhood filtering not supported)
+    payload["postal_code"] = zip_code
+    headers = {
+        "Content-Type": "application/json",
+        "x-rapidapi-key": CFG.rapidapi_key,
+        "x-rapidapi-host": CFG.rapidapi_host,
+    }
+    try:
+        r = _http.post(CFG.rapidapi_list_url, headers=headers, json=payload, timeout=REQUEST_TIMEOUT)
+        if r.status_code == 404:
+            data = {"results": [], "counts": {"active_total": 0, "under_budget": 0, "in_target_band": 0}}
+        elif r.status_code == 429:
+            # Rate limit hit - return helpful message
+            return func.HttpResponse(
+                json.dumps({
+                    "status": "rate_limit",
+                    "message": "Daily listing limit reached. Try again tomorrow!",
+                    "results": [],
+                    "counts": {"active_total": 0, "under_budget": 0, "in_target_band": 0}
+                }),
+                mimetype="application/json",
+                headers=CORS_HEADERS
+            )
+        else:
+            r.raise_for_status()
+            raw = _json_loads(r.content)
+
+            if raw is None:
+                data = {"results": [], "counts": {"active_total": 0, "under_budget": 0, "in_target_band": 0}}
+                _cache_set_listings(cache_key, data)
+                return func.HttpResponse(json.dumps({
+                    "status": "error",
+                    "message": "API returned empty response",
+                    "results": [],
+                    "counts": {"active_total": 0, "under_budget": 0, "in_target_band": 0}
+                }), mimetype="application/json", headers=CORS_HEADERS)
+
+            props = (raw or {}).get("data", {}).get("home_search", {}).get("results", []) or []
+
+            items: List[Listing] = []
+            prices: List[float] = []
+            target_price = None
+            if arv and discount:
+                target_price = int(arv * discount)
+
+            total_props = len(props)
+            logging.info(f"API returned {total_props} properties for ZIP {zip_code}")
+
+            # Process properties
+            for p in props:
+                # Normalize a handful of fields (many feeds use similar names)
+                price = (
+                    p.get("list_price") or p.get("price") or
+                    (p.get("location") or {}).get("address", {}).get("coordinate", {}).get("price")
+                )
+                if not isinstance(price, (int, float)):
+                    continue
+
+                addr = (p.get("location") or {}).get("address", {}) or {}
+                line = addr.get("line") or ""
+                city_name = addr.get("city") or ""
+                state = addr.get("state_code") or addr.get("state") or ""
+                postal = addr.get("postal_code") or zip_code
+
+                beds = p.get("description", {}).get("beds") or p.get("beds")
+                baths = p.get("description", {}).get("baths") or p.get("baths")
+                dom = p.get("days_on_market") or p.get("list_days_on_market") or p.get("dom")
+
+                # Link & photo if present
+                href = (p.get("href") or p.get("permalink") or p.get("rdc_web_url") or "")
+                photo = ""
+                photos = p.get("photos") or []
+                if isinstance(photos, list) and photos:
+                    first = photos[0]
+                    photo = first.get("href") or first.get("url") or ""
+
+                items.append(Listing(
+                    price=int(price),
+                    address=", ".join([s for s in [line, city_name, state] if s]),
+                    zip=postal,
+                    beds=beds,
+                    baths=baths,
+                    dom=dom if isinstance(dom, int) else None,
+                    url=href,
+                    photo=photo,
+                ))
+                prices.append(price)
+
+            under_budget = sum(1 for price in prices if price <= price_max) if price_max else 0
+            in_target = sum(1 for price in prices if price <= target_price) if target_price else 0
+
+            # Determine if filtering was actually applied by location ID (or if we fell back to ZIP)
+            filtering_applied = bool(location_id_data and (location_id_data.get("slug_id") or location_id_data.get("geo_id")))
+
+            # Log filtering results
+            logging.info(f"Filtering results for ZIP {zip_code}:")
+            logging.info(f"  Total properties returned: {total_props}")
+            if neighborhood:
+                logging.info(f"  Neighborhood requested: '{neighborhood}'")
+                if filtering_applied and location_id_data:
+                    logging.info(f"  Location ID filtering applied via API")
+                    if location_id_data.get("slug_id"):
+                        logging.info(f"  Used slug_id: {location_id_data['slug_id']}")
+                    elif location_id_data.get("geo_id"):
+                        logging.info(f"  Used geo_id: {location_id_data['geo_id']}")
+                else:
+                    logging.info(f"  No location ID found - fell back to ZIP {zip_code}")
+            logging.info(f"  Final items count: {len(items)}")
+
+            data = {
+                "results": heapq.nsmallest(limit, items, key=lambda x: x.price),
+                "counts": {
+                    "active_total": len(items),
+                    "under_budget": under_budget,
+                    "in_target_band": in_target
+                }
+            }
+
+        _cache_set_listings(cache_key, data)
+
+    except Exception as e:
+        logging.warning("Listings fetch failed for %s: %s", cache_key, e)
+        data = {"results": [], "counts": {"active_total": 0, "under_budget": 0, "in_target_band": 0}}
+    return data
+
 @app.route(route="listings", methods=["GET"])
 def listings_endpoint(req: func.HttpRequest) -> func.HttpResponse:
     """
@@ -2033,8 +2507,9 @@ def listings_endpoint(req: func.HttpRequest) -> func.HttpResponse:
       price_max    optional: user's max purchase price (for "under budget" count)
       arv          optional: ARV/median value, used with 'discount' to count the target band
       discount     optional: default 0.77 (i.e., <= 77% of ARV is "target band")
+      pretty       optional: 1 to indent the JSON response
     """
-    if not (RAPIDAPI_KEY and RAPIDAPI_HOST and RAPIDAPI_TEST_URL):
+    if not CFG.rapidapi_configured:
         return func.HttpResponse(
             json.dumps({"status": "error", "message": "Market/listings API not configured"}),
             status_code=400, mimetype="application/json", headers=CORS_HEADERS
@@ -2060,15 +2535,11 @@ def listings_endpoint(req: func.HttpRequest) -> func.HttpResponse:
     state_fips = (req.params.get("state_fips") or "18").strip()  # Default: Indiana
     county_fips = (req.params.get("county_fips") or "097").strip()  # Default: Marion County
 
-    # Fetch tract boundary if tract filtering requested
-    tract_boundary = None
+    # Fetch tract boundary if tract filtering requested (in the background, overlapping the listings call)
+    boundary_future = None
     if tract_code:
         logging.info(f"Tract filtering requested: state={state_fips}, county={county_fips}, tract={tract_code}")
-        tract_boundary = fetch_tract_boundary(state_fips, county_fips, tract_code)
-        if tract_boundary:
-            logging.info(f"Successfully fetched boundary with {len(tract_boundary)} rings, first ring has {len(tract_boundary[0])} points")
-        else:
-            logging.warning(f"Could not fetch boundary for tract {tract_code}, proceeding without filtering")
+        boundary_future = _io_pool.submit(fetch_tract_boundary, state_fips, county_fips, tract_code)
 
     try:
         limit = max(1, min(int(req.params.get("limit", "12")), 50))
@@ -2102,145 +2573,22 @@ def listings_endpoint(req: func.HttpRequest) -> func.HttpResponse:
     if cached is not None:
         data = cached
     else:
-        # Call RapidAPI provider
-        # Build payload - prefer location ID if we have it, otherwise use postal_code
-        payload = {
-            "limit": max(25, limit),
-            "offset": 0,
-            "status": ["for_sale", "under_contract"],
-            "sort": {"direction": "desc", "field": "list_date"},
-        }
-
-        # Use postal_code for filtering (neighborhood filtering not supported)
-        payload["postal_code"] = zip_code
-        headers = {
-            "Content-Type": "application/json",
-            "x-rapidapi-key": RAPIDAPI_KEY,
-            "x-rapidapi-host": RAPIDAPI_HOST,
-        }
-        try:
-            r = requests.post(RAPIDAPI_TEST_URL, headers=headers, json=payload, timeout=REQUEST_TIMEOUT)
-            if r.status_code == 404:
-                data = {"results": [], "counts": {"active_total": 0, "under_budget": 0, "in_target_band": 0}}
-            elif r.status_code == 429:
-                # Rate limit hit - return helpful message
-                return func.HttpResponse(
-                    json.dumps({
-                        "status": "rate_limit",
-                        "message": "Daily listing limit reached. Try again tomorrow!",
-                        "results": [],
-                        "counts": {"active_total": 0, "under_budget": 0, "in_target_band": 0}
-                    }),
-                    mimetype="application/json",
-                    headers=CORS_HEADERS
-                )
-            else:
-                r.raise_for_status()
-                raw = r.json()
-
-                if raw is None:
-                    data = {"results": [], "counts": {"active_total": 0, "under_budget": 0, "in_target_band": 0}}
-                    _cache_set_listings(cache_key, data)
-                    return func.HttpResponse(json.dumps({
-                        "status": "error",
-                        "message": "API returned empty response",
-                        "results": [],
-                        "counts": {"active_total": 0, "under_budget": 0, "in_target_band": 0}
-                    }), mimetype="application/json", headers=CORS_HEADERS)
-
-                props = (raw or {}).get("data", {}).get("home_search", {}).get("results", []) or []
-
-                items = []
-                under_budget = 0
-                in_target = 0
-                target_price = None
-                if arv and discount:
-                    target_price = int(arv * discount)
-
-                total_props = len(props)
-                logging.info(f"API returned {total_props} properties for ZIP {zip_code}")
-
-                # Process properties
-                for p in props:
-                    # Normalize a handful of fields (many feeds use similar names)
-                    price = (
-                        p.get("list_price") or p.get("price") or
-                        (p.get("location") or {}).get("address", {}).get("coordinate", {}).get("price")
-                    )
-                    if not isinstance(price, (int, float)):
-                        continue
-
-                    addr = (p.get("location") or {}).get("address", {}) or {}
-                    line = addr.get("line") or ""
-                    city_name = addr.get("city") or ""
-                    state = addr.get("state_code") or addr.get("state") or ""
-                    postal = addr.get("postal_code") or zip_code
-
-                    beds = p.get("description", {}).get("beds") or p.get("beds")
-                    baths = p.get("description", {}).get("baths") or p.get("baths")
-                    dom = p.get("days_on_market") or p.get("list_days_on_market") or p.get("dom")
-
-                    # Link & photo if present
-                    href = (p.get("href") or p.get("permalink") or p.get("rdc_web_url") or "")
-                    photo = ""
-                    photos = p.get("photos") or []
-                    if isinstance(photos, list) and photos:
-                        first = photos[0]
-                        photo = first.get("href") or first.get("url") or ""
-
-                    items.append({
-                        "price": int(price),
-                        "address": ", ".join([s for s in [line, city_name, state] if s]),
-                        "zip": postal,
-                        "beds": beds,
-                        "baths": baths,
-                        "dom": dom if isinstance(dom, int) else None,
-                        "url": href,
-                        "photo": photo
-                    })
-
-                    if price_max and price <= price_max:
-                        under_budget += 1
-                    if target_price and price <= target_price:
-                        in_target += 1
-
-                # Determine if filtering was actually applied by location ID (or if we fell back to ZIP)
-                filtering_applied = bool(location_id_data and (location_id_data.get("slug_id") or location_id_data.get("geo_id")))
-
-                # Log filtering results
-                logging.info(f"Filtering results for ZIP {zip_code}:")
-                logging.info(f"  Total properties returned: {total_props}")
-                if neighborhood:
-                    logging.info(f"  Neighborhood requested: '{neighborhood}'")
-                    if filtering_applied and location_id_data:
-                        logging.info(f"  Location ID filtering applied via API")
-                        if location_id_data.get("slug_id"):
-                            logging.info(f"  Used slug_id: {location_id_data['slug_id']}")
-                        elif location_id_data.get("geo_id"):
-                            logging.info(f"  Used geo_id: {location_id_data['geo_id']}")
-                    else:
-                        logging.info(f"  No location ID found - fell back to ZIP {zip_code}")
-                logging.info(f"  Final items count: {len(items)}")
-
-                data = {
-                    "results": sorted(items, key=lambda x: x["price"])[:limit],
-                    "counts": {
-                        "active_total": len(items),
-                        "under_budget": under_budget,
-                        "in_target_band": in_target
-                    }
-                }
-
-            _cache_set_listings(cache_key, data)
+        data = _coalesce_listings_fetch(cache_key, lambda: fetch_listings_data(
+            zip_code, cache_key, limit, price_max, arv, discount, neighborhood, location_id_data))
+        if isinstance(data, func.HttpResponse):
+            return data
 
-        except Exception as e:
-            logging.warning("Listings fetch failed for %s: %s", cache_key, e)
-            data = {"results": [], "counts": {"active_total": 0, "under_budget": 0, "in_target_band": 0}}
+    if boundary_future is not None:
+        tract_boundary = boundary_future.result()
+        if tract_boundary:
+            logging.info(f"Successfully fetched boundary with {len(tract_boundary)} rings, first ring has {len(tract_boundary[0])} points")
+        else:
+            logging.warning(f"Could not fetch boundary for tract {tract_code}, proceeding without filtering")
 
-    return func.HttpResponse(json.dumps({
+    return _json_response(req, {
         "status": "success",
         "zip": zip_code,
         "neighborhood": neighborhood if neighborhood else None,
         "counts": data.get("counts", {}),
-        "results": data.get("results", [])
-    }, indent=2), mimetype="application/json", headers=CORS_HEADERS)
+        "results": [listing.to_dict() for listing in data.get("results", [])]
+    }, pretty=_to_bool(req.params.get("pretty"), False))
@@ -33,6 +33,15 @@ class MockRequest:
         self.method = flask_request.method
         self.params = flask_request.args
         self.url = flask_request.url
+        self.headers = flask_request.headers
+
+def to_flask_response(response):
+    """Convert an Azure Functions HttpResponse, keeping the gzip encoding headers if it was compressed"""
+    headers = {'Content-Type': 'application/json'}
+    for name in ('Content-Encoding', 'Vary'):
+        if response.headers.get(name):
+            headers[name] = response.headers.get(name)
+    return response.get_body(), response.status_code, headers
 
 @app.route('/')
 def serve_index():
@@ -44,8 +53,7 @@ def api_analyze():
     """Proxy to the analyze_neighborhoods function"""
     try:
         mock_req = MockRequest(request)
-        response = analyze_neighborhoods(mock_req)
-        return response.get_body().decode('utf-8'), response.status_code, {'Content-Type': 'application/json'}
+        return to_flask_response(analyze_neighborhoods(mock_req))
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
@@ -54,8 +62,7 @@ def api_health():
     """Proxy to the health_check function"""
     try:
         mock_req = MockRequest(request)
-        response = health_check(mock_req)
-        return response.get_body().decode('utf-8'), response.status_code, {'Content-Type': 'application/json'}
+        return to_flask_response(health_check(mock_req))
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
@@ -64,8 +71,7 @@ def api_listings():
     """Proxy to the listings_endpoint function"""
     try:
         mock_req = MockRequest(request)
-        response = listings_endpoint(mock_req)
-        return response.get_body().decode('utf-8'), response.status_code, {'Content-Type': 'application/json'}
+        return to_flask_response(listings_endpoint(mock_req))
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
@@ -6,68 +6,50 @@ Cost: ~$1 (200 tracts * $5 per 1000 requests)
 Usage:
 1. Set GOOGLE_MAPS_API_KEY environment variable or edit below
 2. Run: python3 scripts/01_google_maps_neighborhoods.py
-3. Copy the output and paste into function_app.py
+3. The mapping is written to api/data/google_maps_neighborhoods.json.gz
+   (loaded by function_app.py) - commit that file
 4. Delete this script!
 """
 
+import gzip
 import os
+import random
 import requests
 import json
 import time
+from concurrent.futures import as_completed
+
+from api_cache import json_loads, open_api_cache
+from http_session import lookup_pool, make_session
+from rate_limiter import RateLimiter
+from tiger_tracts import get_tract_centers
 
 # Set your Google Maps API key here or via environment variable
 GOOGLE_MAPS_API_KEY = os.environ.get("GOOGLE_MAPS_API_KEY", "YOUR_KEY_HERE")
 
+# Geocoding requests per second across all workers (Google allows 50)
+GOOGLE_MAPS_QPS = float(os.environ.get("GOOGLE_MAPS_QPS", "40"))
+GOOGLE_MAX_RETRIES = 4  # on OVER_QUERY_LIMIT / HTTP 429
+
+# Address component types accepted as a neighborhood name (else fall back to "locality")
+NEIGHBORHOOD_TYPES = frozenset({"neighborhood", "sublocality"})
+
+SESSION = make_session()
+
 # Census API to get tract boundaries
 ACS_YEAR = "2023"
 ACS_BASE = f"https://api.census.gov/data/{ACS_YEAR}/acs/acs5"
 MARION_COUNTY_FIPS = "097"
 
-def get_tract_center(geoid):
-    """Get center lat/lng from Census tract GEOID"""
-    # Using internal point from Census (most representative point)
-    url = f"https://api.census.gov/data/{ACS_YEAR}/acs/acs5"
-    params = {
-        "get": "NAME",
-        "for": f"tract:{geoid[-6:]}",
-        "in": f"state:18 county:{MARION_COUNTY_FIPS}"
-    }
-
-    # For simplicity, we'll get internal point from the detailed tract data
-    # Alternative: use Census TIGER/Line shapefiles, but that's overkill
-    # We'll use a simpler approach - get it from the tract metadata endpoint
+# Tracts looked up concurrently (one Google call each).
+# The Google request rate is paced separately by google_limiter.
+MAX_WORKERS = 16
 
-    tiger_url = f"https://tigerweb.geo.census.gov/arcgis/rest/services/TIGERweb/tigerWMS_ACS2023/MapServer/8/query"
-    params = {
-        "where": f"GEOID='{geoid}'",
-        "outFields": "INTPTLAT,INTPTLON",
-        "f": "json"
-    }
+# Where function_app.py loads the mapping from
+OUTPUT_PATH = os.path.join(os.path.dirname(__file__), "..", "api", "data", "google_maps_neighborhoods.json.gz")
 
-    try:
-        r = requests.get(tiger_url, params=params, timeout=10)
-        data = r.json()
-        if data.get("features"):
-            attrs = data["features"][0]["attributes"]
-            return float(attrs["INTPTLAT"]), float(attrs["INTPTLON"])
-    except:
-        pass
-
-    # Fallback: estimate from tract code (rough approximation)
-    # Indianapolis is roughly centered at 39.77, -86.15
-    # This is just a backup - we'll try to get real coords first
-    tract_num = int(geoid[-6:])
-    base_lat = 39.77
-    base_lng = -86.15
-
-    # Rough grid estimation (not perfect but works for fallback)
-    row = (tract_num // 100) % 10
-    col = tract_num % 100
-
-    lat = base_lat + (row - 5) * 0.02
-    lng = base_lng + (col - 50) * 0.02
-
-    return lat, lng
+google_limiter = RateLimiter(GOOGLE_MAPS_QPS, burst=50)
+api_cache = open_api_cache()
 
 def get_neighborhood_from_google(lat, lng):
     """Call Google Maps Geocoding API to get neighborhood name"""
@@ -78,16 +60,28 @@ def get_neighborhood_from_google(lat, lng):
         "result_type": "neighborhood|sublocality|locality"
     }
 
+    # Rounded so tiny float differences between runs still hit the cache
+    cache_key = f"google:{round(lat, 5)},{round(lng, 5)}"
+
     try:
-        r = requests.get(url, params=params, timeout=10)
-        data = r.json()
+        data = api_cache.get(cache_key)
+        if data is None:
+            for attempt in range(GOOGLE_MAX_RETRIES + 1):
+                google_limiter.acquire()
+                r = SESSION.get(url, params=params, timeout=10)
+                data = json_loads(r.content) if r.status_code != 429 else {"status": "OVER_QUERY_LIMIT"}
+                if data.get("status") != "OVER_QUERY_LIMIT" or attempt == GOOGLE_MAX_RETRIES:
+                    break
+                # Exponential backoff with jitter so throttled workers don't retry in lockstep
+                time.sleep((2 ** attempt) * 0.5 + random.uniform(0, 0.5))
+            if data.get("status") in ("OK", "ZERO_RESULTS"):
+                api_cache.set(cache_key, data)
 
         if data["status"] == "OK" and data["results"]:
             # Try to find neighborhood or sublocality
             for result in data["results"]:
                 for component in result["address_components"]:
-                    types = component["types"]
-                    if "neighborhood" in types or "sublocality" in types:
+                    if not NEIGHBORHOOD_TYPES.isdisjoint(component["types"]):
                         return component["long_name"]
 
             # Fallback to locality (city level)
@@ -97,10 +91,16 @@ def get_neighborhood_from_google(lat, lng):
                         return f"Indianapolis — {component['long_name']}"
 
         return None
-    except Exception as e:
+    except (requests.RequestException, KeyError, TypeError, ValueError) as e:
         print(f"  Error calling Google Maps API: {e}")
         return None
 
+def lookup_tract(center):
+    """Google neighborhood for a tract's center point"""
+    if center is None:
+        return None  # no TIGER point: reported as an error without spending a Google call
+    return get_neighborhood_from_google(*center)
+
 def main():
     print("\n" + "="*70)
     print("GOOGLE MAPS NEIGHBORHOOD MAPPER")
@@ -119,8 +119,8 @@ def main():
         "in": f"state:18 county:{MARION_COUNTY_FIPS}"
     }
 
-    r = requests.get(ACS_BASE, params=params, timeout=30)
-    data = r.json()
+    r = SESSION.get(ACS_BASE, params=params, timeout=30)
+    data = json_loads(r.content)
 
     tracts = []
     for row in data[1:]:  # Skip header
@@ -129,46 +129,45 @@ def main():
         tracts.append((tract, geoid))
 
     print(f"Found {len(tracts)} census tracts in Marion County")
+
+    centers = get_tract_centers(MARION_COUNTY_FIPS, SESSION, api_cache)
+    print(f"Got center points for {len(centers)}/{len(tracts)} tracts from TIGERweb")
     print(f"\nEstimated cost: ${len(tracts) * 0.005:.2f}")
-    print("\nStarting neighborhood lookup (this will take a few minutes)...\n")
+    print("\nStarting neighborhood lookup...\n")
 
     mapping = {}
     errors = []
 
-    for i, (tract, geoid) in enumerate(tracts, 1):
-        print(f"[{i}/{len(tracts)}] Tract {tract}...", end=" ")
+    # Fan out across tracts; results print in completion order
+    with lookup_pool(MAX_WORKERS) as pool:
+        futures = {pool.submit(lookup_tract, centers.get(geoid)): tract for tract, geoid in tracts}
+        for i, future in enumerate(as_completed(futures), 1):
+            tract = futures[future]
+            neighborhood = future.result()
+
+            if neighborhood:
+                mapping[tract] = neighborhood
+                print(f"[{i}/{len(tracts)}] Tract {tract}... ✓ {neighborhood}")
+            else:
+                errors.append(tract)
+                print(f"[{i}/{len(tracts)}] Tract {tract}... ✗ No neighborhood found")
+
+    # Write the gzipped JSON table that function_app.py loads
+    ordered = {tract: mapping[tract] for tract in sorted(mapping.keys(), key=lambda x: int(x))}
+    body = json.dumps(ordered, ensure_ascii=False, indent=0).encode("utf-8")
+    with open(OUTPUT_PATH, "wb") as f:
+        f.write(gzip.compress(body, mtime=0))
 
-        # Get tract center coordinates
-        lat, lng = get_tract_center(geoid)
-
-        # Call Google Maps
-        neighborhood = get_neighborhood_from_google(lat, lng)
-
-        if neighborhood:
-            mapping[tract] = neighborhood
-            print(f"✓ {neighborhood}")
-        else:
-            errors.append(tract)
-            print(f"✗ No neighborhood found")
-
-        # Rate limiting - be nice to Google's API
-        time.sleep(0.2)  # 5 requests per second max
-
-    # Generate Python code
     print("\n" + "="*70)
-    print("RESULTS - Copy this into function_app.py:")
+    print("RESULTS")
     print("="*70)
-    print()
-    print("# Google Maps neighborhood mapping (generated " + time.strftime("%Y-%m-%d") + ")")
-    print("GOOGLE_MAPS_NEIGHBORHOODS = {")
-    for tract in sorted(mapping.keys(), key=lambda x: int(x)):
-        print(f'    "{tract}": "{mapping[tract]}",')
-    print("}")
+    print(f"\nWrote {len(ordered)} neighborhoods to {os.path.normpath(OUTPUT_PATH)}")
+    print("Update the 'generated' date above GOOGLE_MAPS_NEIGHBORHOODS_PATH in function_app.py")
     print()
 
     if errors:
         print(f"\n⚠️  {len(errors)} tracts had no neighborhood data:")
-        print(f"   {', '.join(errors)}")
+        print(f"   {', '.join(sorted(errors, key=int))}")
 
     print(f"\n✅ Done! Successfully mapped {len(mapping)}/{len(tracts)} tracts")
     print(f"💰 Estimated cost: ${len(tracts) * 0.005:.2f}")
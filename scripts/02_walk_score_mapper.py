@@ -24,10 +24,20 @@ Usage:
 
 import os
 import requests
-import time
+from concurrent.futures import as_completed
+
+from api_cache import json_loads, open_api_cache
+from http_session import lookup_pool, make_session
 
 WALK_SCORE_API_KEY = os.environ.get("WALK_SCORE_API_KEY", "YOUR_KEY_HERE")
 
+# Neighborhoods scored at once; stays within the free tier's request rate
+MAX_WORKERS = 5
+
+SESSION = make_session()
+
+api_cache = open_api_cache()
+
 # Representative coordinates for each Indianapolis neighborhood
 # (You'd get these from the Google Maps script or manually)
 NEIGHBORHOODS = {
@@ -58,15 +68,20 @@ def get_walk_score(lat, lng, address_label):
         "wsapikey": WALK_SCORE_API_KEY
     }
 
+    cache_key = f"walkscore:{lat},{lng}"
+
     try:
-        r = requests.get(url, params=params, timeout=10)
-        data = r.json()
+        data = api_cache.get(cache_key)
+        if data is None:
+            r = SESSION.get(url, params=params, timeout=10)
+            data = json_loads(r.content)
 
         if data.get("status") == 1:  # Success
+            api_cache.set(cache_key, data)
             return data.get("walkscore"), data.get("description")
         else:
             return None, data.get("status")
-    except Exception as e:
+    except (requests.RequestException, KeyError, TypeError, ValueError) as e:
         return None, str(e)
 
 def main():
@@ -85,18 +100,21 @@ def main():
 
     scores = {}
 
-    for neighborhood, (lat, lng) in NEIGHBORHOODS.items():
-        print(f"Checking {neighborhood}...", end=" ")
-
-        score, desc = get_walk_score(lat, lng, neighborhood)
-
-        if score is not None:
-            scores[neighborhood] = score
-            print(f"✓ {score}/100 ({desc})")
-        else:
-            print(f"✗ Error: {desc}")
-
-        time.sleep(1)  # Be nice to the API
+    # Bounded fan-out replaces the one-second sleep between calls
+    with lookup_pool(MAX_WORKERS) as pool:
+        futures = {
+            pool.submit(get_walk_score, lat, lng, neighborhood): neighborhood
+            for neighborhood, (lat, lng) in NEIGHBORHOODS.items()
+        }
+        for future in as_completed(futures):
+            neighborhood = futures[future]
+            score, desc = future.result()
+
+            if score is not None:
+                scores[neighborhood] = score
+                print(f"Checking {neighborhood}... ✓ {score}/100 ({desc})")
+            else:
+                print(f"Checking {neighborhood}... ✗ Error: {desc}")
 
     # Generate Python code
     print("\n" + "="*70)
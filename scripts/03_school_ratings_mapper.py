@@ -17,13 +17,28 @@ Usage:
 
 import os
 import requests
-import time
 import statistics
+from array import array
+from collections import defaultdict
+from concurrent.futures import as_completed
+from dataclasses import dataclass, field
+
+from api_cache import json_loads, open_api_cache
+from http_session import lookup_pool, make_session
+from rate_limiter import RateLimiter
 
 # Use the same RapidAPI key as your Realtor.com API
 RAPIDAPI_KEY = os.environ.get("RAPIDAPI_KEY", "YOUR_KEY_HERE")
 RAPIDAPI_HOST = "schooldigger-k-12-school-data-api.p.rapidapi.com"
 
+# Concurrent ZIP lookups, paced to stay under RapidAPI's per-endpoint request rate
+MAX_WORKERS = 8
+SCHOOLDIGGER_QPS = 8
+schooldigger_limiter = RateLimiter(SCHOOLDIGGER_QPS)
+api_cache = open_api_cache()
+
+SESSION = make_session()
+
 # ZIP codes for Indianapolis metro area neighborhoods and suburbs
 # Covers all 9 counties in your census data: Marion, Hamilton, Hendricks,
 # Johnson, Boone, Hancock, Madison, Morgan, Shelby
@@ -115,6 +130,23 @@ NEIGHBORHOOD_ZIPS = {
     "Shelbyville": "46176",
 }
 
+@dataclass
+class SchoolsBatch:
+    """Schools in one ZIP as parallel columns; main() only aggregates the ratings"""
+    names: list = field(default_factory=list)
+    levels: list = field(default_factory=list)
+    ratings: array = field(default_factory=lambda: array("b"))  # 1-10
+    rank_percentiles: list = field(default_factory=list)
+
+    def append(self, name, level, rating, rank):
+        self.names.append(name)
+        self.levels.append(level)
+        self.ratings.append(rating)
+        self.rank_percentiles.append(rank)
+
+    def __len__(self):
+        return len(self.ratings)
+
 def get_schools_in_zip(zip_code):
     """Fetch all schools in a ZIP code via SchoolDigger API"""
     # SchoolDigger API endpoint v2.0 (via RapidAPI)
@@ -131,45 +163,47 @@ def get_schools_in_zip(zip_code):
         "perPage": 50  # Get more schools to ensure we cover the area
     }
 
+    cache_key = f"schooldigger:{zip_code}"
+
     try:
-        r = requests.get(url, headers=headers, params=params, timeout=15)
-
-        if r.status_code == 200:
-            data = r.json()
-            schools = []
-
-            # SchoolDigger v2.0 returns a list of school objects
-            # Try different possible keys for the school list
-            school_list = data.get("schoolList", data.get("schools", []))
-
-            for school in school_list:
-                # SchoolDigger uses "rankingstatewide" or "rankingStatewide" as the rating metric
-                # It's a percentile rank (1-100), we'll convert to 1-10 scale
-                rank = school.get("rankingstatewide") or school.get("rankingStatewide")
-                name = school.get("schoolName", school.get("name", "Unknown"))
-                level = school.get("schoolLevel", school.get("level", "Unknown"))
-
-                if rank is not None:
-                    # Convert percentile rank to 1-10 rating
-                    # Top 10% = 10, 10-20% = 9, etc.
-                    rating = max(1, min(10, 11 - (rank // 10)))
-
-                    schools.append({
-                        "name": name,
-                        "rating": rating,
-                        "type": level,
-                        "rank_percentile": rank
-                    })
-
-            return schools
-        elif r.status_code == 429:
-            print(f"    Rate limit hit!")
-            return None
-        else:
-            print(f"    API error: {r.status_code} - {r.text[:200]}")
-            return None
-
-    except Exception as e:
+        data = api_cache.get(cache_key)
+        if data is None:
+            schooldigger_limiter.acquire()
+            r = SESSION.get(url, headers=headers, params=params, timeout=15)
+
+            if r.status_code == 429:
+                print(f"    Rate limit hit!")
+                return None
+            elif r.status_code != 200:
+                print(f"    API error: {r.status_code} - {r.text[:200]}")
+                return None
+
+            data = json_loads(r.content)
+            api_cache.set(cache_key, data)
+
+        schools = SchoolsBatch()
+
+        # SchoolDigger v2.0 returns a list of school objects
+        # Try different possible keys for the school list
+        school_list = data.get("schoolList", data.get("schools", []))
+
+        for school in school_list:
+            # SchoolDigger uses "rankingstatewide" or "rankingStatewide" as the rating metric
+            # It's a percentile rank (1-100), we'll convert to 1-10 scale
+            rank = school.get("rankingstatewide") or school.get("rankingStatewide")
+            name = school.get("schoolName", school.get("name", "Unknown"))
+            level = school.get("schoolLevel", school.get("level", "Unknown"))
+
+            if rank is not None:
+                # Convert percentile rank to 1-10 rating
+                # Top 10% = 10, 10-20% = 9, etc.
+                rating = int(max(1, min(10, 11 - (rank // 10))))
+
+                schools.append(name, level, rating, rank)
+
+        return schools
+
+    except (requests.RequestException, KeyError, TypeError, ValueError) as e:
         print(f"    Error: {e}")
         return None
 
@@ -184,29 +218,39 @@ def main():
         print("   export RAPIDAPI_KEY='your-rapidapi-key-here'")
         return
 
-    print(f"\nFetching school ratings for {len(NEIGHBORHOOD_ZIPS)} neighborhoods...")
+    # Several neighborhoods share a ZIP; look each ZIP up once and apply it to all of them
+    zip_neighborhoods = defaultdict(list)
+    for neighborhood, zip_code in NEIGHBORHOOD_ZIPS.items():
+        zip_neighborhoods[zip_code].append(neighborhood)
+
+    print(f"\nFetching school ratings for {len(NEIGHBORHOOD_ZIPS)} neighborhoods ({len(zip_neighborhoods)} ZIPs)...")
     print("(SchoolDigger via RapidAPI - 2,000 free calls/month)\n")
 
     ratings = {}
 
-    for neighborhood, zip_code in NEIGHBORHOOD_ZIPS.items():
-        print(f"Checking {neighborhood} (ZIP {zip_code})...", end=" ")
-
-        schools = get_schools_in_zip(zip_code)
-
-        if schools:
-            # Calculate average rating for the neighborhood
-            avg_rating = sum(s["rating"] for s in schools) / len(schools) if schools else 0
-            ratings[neighborhood] = {
-                "avg_rating": round(avg_rating, 1),
-                "num_schools": len(schools),
-                "top_school": max(schools, key=lambda x: x["rating"])["rating"] if schools else 0
-            }
-            print(f"✓ Avg: {avg_rating:.1f}/10 ({len(schools)} schools)")
-        else:
-            print(f"✗ No data")
-
-        time.sleep(1)  # Rate limiting
+    # Worker pool over the unique ZIPs; schooldigger_limiter replaces the one-second sleep
+    with lookup_pool(MAX_WORKERS) as pool:
+        futures = {pool.submit(get_schools_in_zip, zip_code): zip_code for zip_code in zip_neighborhoods}
+        for future in as_completed(futures):
+            zip_code = futures[future]
+            schools = future.result()
+
+            # Aggregate once per ZIP; every neighborhood in it gets the same numbers
+            school_ratings = schools.ratings if schools else ()
+            if school_ratings:
+                avg_rating = sum(school_ratings) / len(school_ratings)
+                top_school = max(school_ratings)
+
+            for neighborhood in zip_neighborhoods[zip_code]:
+                if school_ratings:
+                    ratings[neighborhood] = {
+                        "avg_rating": round(avg_rating, 1),
+                        "num_schools": len(schools),
+                        "top_school": top_school
+                    }
+                    print(f"Checking {neighborhood} (ZIP {zip_code})... ✓ Avg: {avg_rating:.1f}/10 ({len(schools)} schools)")
+                else:
+                    print(f"Checking {neighborhood} (ZIP {zip_code})... ✗ No data")
 
     # Generate Python code
     print("\n" + "="*70)
@@ -16,7 +16,11 @@ Usage:
 
 import requests
 import time
-from collections import defaultdict
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from functools import lru_cache
+
+from api_cache import json_loads
 
 # Socrata API endpoint for Indianapolis crime data (last 90 days)
 CRIME_DATA_URL = "https://data.indy.gov/resource/crime-incidents.json"
@@ -48,7 +52,8 @@ def fetch_recent_crimes():
         r = requests.get(CRIME_DATA_URL, params=params, timeout=30)
 
         if r.status_code == 200:
-            return r.json()
+            # orjson when installed: tens of MB of JSON parse several times faster
+            return json_loads(r.content)
         else:
             print(f"Error: HTTP {r.status_code}")
             return None
@@ -56,36 +61,59 @@ def fetch_recent_crimes():
         print(f"Error fetching crime data: {e}")
         return None
 
+# Keywords matched anywhere in the UCR hierarchy text (violent wins over property)
+VIOLENT_KEYWORDS = ("HOMICIDE", "ROBBERY", "ASSAULT", "RAPE")
+PROPERTY_KEYWORDS = ("BURGLARY", "THEFT", "AUTO THEFT", "VANDALISM")
+
+# Memoized: the feed only uses a few dozen distinct UCR values across 50k rows
+@lru_cache(maxsize=256)
 def categorize_crime(ucr_code):
     """Categorize crime by severity (property crimes matter most for home values)"""
-    violent = ["HOMICIDE", "ROBBERY", "ASSAULT", "RAPE"]
-    property_crime = ["BURGLARY", "THEFT", "AUTO THEFT", "VANDALISM"]
-
-    if any(v in ucr_code.upper() for v in violent):
+    code = ucr_code.upper()
+    if any(v in code for v in VIOLENT_KEYWORDS):
         return "violent"
-    elif any(p in ucr_code.upper() for p in property_crime):
+    elif any(p in code for p in PROPERTY_KEYWORDS):
         return "property"
     else:
         return "other"
 
 def count_crimes_by_neighborhood(crimes):
     """Count crimes in each neighborhood boundary"""
-    counts = defaultdict(lambda: {"violent": 0, "property": 0, "other": 0, "total": 0})
+    counts = {}
 
+    # Parse coordinates once, then sort by latitude so each box can bisect to its band
+    points = []
     for crime in crimes:
         try:
             lat = float(crime.get("latitude", 0))
             lng = float(crime.get("longitude", 0))
-            crime_type = categorize_crime(crime.get("ucr_hierarchy", ""))
-
-            # Check which neighborhood this falls in
-            for neighborhood, (min_lat, max_lat, min_lng, max_lng) in NEIGHBORHOOD_BOUNDS.items():
-                if min_lat <= lat <= max_lat and min_lng <= lng <= max_lng:
-                    counts[neighborhood][crime_type] += 1
-                    counts[neighborhood]["total"] += 1
-                    break
-        except:
-            continue
+        except (TypeError, ValueError):
+            continue  # missing/garbled coordinates
+        points.append((lat, lng, crime.get("ucr_hierarchy", "")))
+    points.sort(key=lambda p: p[0])
+    lats = [p[0] for p in points]
+
+    # Boxes overlap (Mass Ave sits inside Downtown's band), so an incident counts
+    # only for the first neighborhood in NEIGHBORHOOD_BOUNDS that contains it
+    claimed = set()
+    for neighborhood, (min_lat, max_lat, min_lng, max_lng) in NEIGHBORHOOD_BOUNDS.items():
+        codes = []
+        for i in range(bisect_left(lats, min_lat), bisect_right(lats, max_lat)):
+            _, lng, ucr_code = points[i]
+            if min_lng <= lng <= max_lng and i not in claimed:
+                claimed.add(i)
+                if isinstance(ucr_code, str):  # no category: skipped, as before
+                    codes.append(ucr_code)
+
+        if codes:
+            # Only incidents inside a box need a category; Counter tallies them in one pass
+            by_type = Counter(map(categorize_crime, codes))
+            counts[neighborhood] = {
+                "violent": by_type["violent"],
+                "property": by_type["property"],
+                "other": by_type["other"],
+                "total": len(codes),
+            }
 
     return counts
 
@@ -132,10 +160,8 @@ def main():
     print("="*70)
     print()
     print("# Crime/Safety scores (higher = safer neighborhood)")
-    print("NEIGHBORHOOD_SAFETY_SCORES = {")
-    for neighborhood in sorted(scores.keys()):
-        print(f'    "{neighborhood}": {scores[neighborhood]},')
-    print("}")
+    entries = "".join(f'    "{neighborhood}": {scores[neighborhood]},\n' for neighborhood in sorted(scores))
+    print(f"NEIGHBORHOOD_SAFETY_SCORES = {{\n{entries}}}")
     print()
     print("# Scoring logic to add:")
     print("# if safety_score >= 80: bonus += 2  # Very safe")
@@ -16,7 +16,8 @@ Usage:
 """
 
 import requests
-import time
+
+from api_cache import json_loads, open_api_cache
 
 # Neighborhoods with center coordinates (from Google Maps script)
 NEIGHBORHOODS = {
@@ -34,52 +35,69 @@ NEIGHBORHOODS = {
 
 OVERPASS_URL = "https://overpass-api.de/api/interpreter"
 
-def count_amenities(lat, lng, radius=800):
+# Overpass responses persisted between runs (see api_cache.py)
+api_cache = open_api_cache()
+
+# Counts reported per neighborhood, in the order the query prints them
+AMENITY_COUNTS = ("total", "restaurants", "shops", "parks")
+
+def count_amenities(neighborhoods, radius=800):
     """
-    Count amenities within radius (meters) of a point using OpenStreetMap.
+    Count amenities within radius (meters) of each neighborhood center using OpenStreetMap.
     radius=800 = ~0.5 miles = walkable distance
+
+    All neighborhoods go in one Overpass query: each gets a named set and four
+    `out count` lines (total, dining, shops, parks). Returns {name: counts};
+    empty if the request fails.
     """
     # Overpass QL query to find amenities
-    query = f"""
-    [out:json][timeout:25];
+    statements = []
+    for i, (lat, lng) in enumerate(neighborhoods.values()):
+        statements.append(f"""
     (
       node["amenity"](around:{radius},{lat},{lng});
       node["shop"](around:{radius},{lat},{lng});
       node["leisure"="park"](around:{radius},{lat},{lng});
       way["leisure"="park"](around:{radius},{lat},{lng});
-    );
-    out count;
-    """
-
+    )->.n{i};
+    .n{i} out count;
+    node.n{i}["amenity"~"^(restaurant|cafe|fast_food|bar)$"]; out count;
+    (node.n{i}["shop"]; node.n{i}["amenity"="marketplace"];); out count;
+    nwr.n{i}["leisure"="park"]; out count;""")
+    query = "[out:json][timeout:25];" + "".join(statements)
+
+    cache_key = f"overpass:{radius}:" + ";".join(f"{lat},{lng}" for lat, lng in neighborhoods.values())
     try:
-        r = requests.post(OVERPASS_URL, data={"data": query}, timeout=30)
-        if r.status_code == 200:
-            data = r.json()
-
-            # Count different types
-            amenities = {"restaurants": 0, "shops": 0, "parks": 0, "total": 0}
-
-            for element in data.get("elements", []):
-                tags = element.get("tags", {})
-                amenity_type = tags.get("amenity", "")
-                shop_type = tags.get("shop", "")
-                leisure_type = tags.get("leisure", "")
-
-                amenities["total"] += 1
-
-                if amenity_type in ["restaurant", "cafe", "fast_food", "bar"]:
-                    amenities["restaurants"] += 1
-                if shop_type or amenity_type in ["marketplace"]:
-                    amenities["shops"] += 1
-                if leisure_type == "park":
-                    amenities["parks"] += 1
-
-            return amenities
-        else:
-            return None
+        data = api_cache.get(cache_key)
+        cached = data is not None
+        if not cached:
+            r = requests.post(OVERPASS_URL, data={"data": query}, timeout=30)
+            if r.status_code != 200:
+                print(f"    Overpass returned HTTP {r.status_code}")
+                return {}
+            data = json_loads(r.content)
+
+        # A server-side timeout still answers 200, with a "remark" and only some of the counts
+        if data.get("remark"):
+            print(f"    Overpass error: {data['remark']}")
+            return {}
+        counts = [int(element["tags"]["total"]) for element in data.get("elements", []) if element.get("type") == "count"]
+        if len(counts) != len(AMENITY_COUNTS) * len(neighborhoods):
+            print(f"    Unexpected Overpass response: {len(counts)} counts for {len(neighborhoods)} neighborhoods")
+            return {}
+
+        width = len(AMENITY_COUNTS)
+        amenities = {
+            name: dict(zip(AMENITY_COUNTS, counts[i * width:(i + 1) * width]))
+            for i, name in enumerate(neighborhoods)
+        }
+        # Only complete answers are cached, so a bad response is retried on the next run
+        if not cached:
+            api_cache.set(cache_key, data)
+        return amenities
     except Exception as e:
         print(f"    Error: {e}")
-        return None
+        return {}
 
 def main():
     print("\n" + "="*70)
@@ -90,10 +108,13 @@ def main():
 
     scores = {}
 
-    for neighborhood, (lat, lng) in NEIGHBORHOODS.items():
+    # One Overpass request for every neighborhood
+    all_amenities = count_amenities(NEIGHBORHOODS)
+
+    for neighborhood in NEIGHBORHOODS:
         print(f"Checking {neighborhood}...", end=" ")
 
-        amenities = count_amenities(lat, lng)
+        amenities = all_amenities.get(neighborhood)
 
         if amenities:
             # Calculate amenity score (0-100)
@@ -113,9 +134,6 @@ def main():
         else:
             print("✗ Failed")
 
-        # Be nice to the free API
-        time.sleep(2)
-
     # Generate Python code
     print("\n" + "="*70)
     print("RESULTS - Add this to function_app.py:")
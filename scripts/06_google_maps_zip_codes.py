@@ -8,18 +8,37 @@ This fixes the listings bug where tracts were getting mapped to wrong ZIP codes
 Usage:
 1. Set GOOGLE_MAPS_API_KEY environment variable (same key as before)
 2. Run: python3 scripts/06_google_maps_zip_codes.py
-3. Copy the output and paste into function_app.py to replace get_zip_for_tract()
+   (interrupted? run it again - tracts already looked up come from the cache, free)
+3. Copy the TRACT_TO_ZIP_MAPPING output and paste it over the one in function_app.py
+   (get_zip_for_tract() stays as is: it reads the packed form built from that dict)
 4. Delete this script!
 """
 
 import os
 import requests
-import json
 import time
+from concurrent.futures import as_completed
+
+from api_cache import json_loads, open_api_cache
+from http_session import lookup_pool, make_session
+from rate_limiter import RateLimiter
+from tiger_tracts import get_tract_centers
 
 # Set your Google Maps API key here or via environment variable
 GOOGLE_MAPS_API_KEY = os.environ.get("GOOGLE_MAPS_API_KEY", "YOUR_KEY_HERE")
 
+SESSION = make_session()
+
+# Geocoding requests per second across all workers (Google allows 50)
+GOOGLE_MAPS_QPS = float(os.environ.get("GOOGLE_MAPS_QPS", "40"))
+google_limiter = RateLimiter(GOOGLE_MAPS_QPS, burst=50)
+
+# Tracts looked up concurrently (one Google call each)
+MAX_WORKERS = 8
+
+# TIGER and Google responses persisted between runs (see api_cache.py)
+api_cache = open_api_cache()
+
 # Census API
 ACS_YEAR = "2023"
 ACS_BASE = f"https://api.census.gov/data/{ACS_YEAR}/acs/acs5"
@@ -37,50 +56,60 @@ COUNTIES = {
     "059": "Hancock",     # Greenfield
 }
 
-def get_tract_center(geoid):
-    """Get center lat/lng from Census tract GEOID using TIGER/Line API"""
-    tiger_url = f"https://tigerweb.geo.census.gov/arcgis/rest/services/TIGERweb/tigerWMS_ACS2023/MapServer/8/query"
+def get_county_tracts(county_fips):
+    """Tract codes in a county, from the Census ACS API"""
     params = {
-        "where": f"GEOID='{geoid}'",
-        "outFields": "INTPTLAT,INTPTLON",
-        "f": "json"
+        "get": "NAME",
+        "for": "tract:*",
+        "in": f"state:18 county:{county_fips}"
     }
-
-    try:
-        r = requests.get(tiger_url, params=params, timeout=10)
-        data = r.json()
-        if data.get("features"):
-            attrs = data["features"][0]["attributes"]
-            return float(attrs["INTPTLAT"]), float(attrs["INTPTLON"])
-    except:
-        pass
-
-    return None, None
+    r = SESSION.get(ACS_BASE, params=params, timeout=30)
+    data = json_loads(r.content)
+    return [row[-1] for row in data[1:]]  # Skip header; last column is tract code
 
 def get_zip_from_google(lat, lng):
     """Call Google Maps Geocoding API to get ZIP code"""
     url = "https://maps.googleapis.com/maps/api/geocode/json"
     params = {
         "latlng": f"{lat},{lng}",
+        # Only the postal-code-level result: a fraction of the full reverse-geocode payload
+        "result_type": "postal_code",
         "key": GOOGLE_MAPS_API_KEY,
     }
 
-    try:
-        r = requests.get(url, params=params, timeout=10)
-        data = r.json()
-
-        if data["status"] == "OK" and data["results"]:
-            # Extract postal_code from address_components
-            for result in data["results"]:
-                for component in result["address_components"]:
-                    if "postal_code" in component["types"]:
-                        return component["long_name"]
+    # Answers are kept in api_cache as they arrive, so a crashed or interrupted run
+    # resumes where it stopped instead of paying for every tract again
+    cache_key = f"google_zip:{round(lat, 5)},{round(lng, 5)}"
 
-        return None
-    except Exception as e:
+    try:
+        data = api_cache.get(cache_key)
+        if data is None:
+            google_limiter.acquire()
+            r = SESSION.get(url, params=params, timeout=10)
+            data = json_loads(r.content)
+            if data.get("status") in ("OK", "ZERO_RESULTS"):
+                api_cache.set(cache_key, data)
+
+        if data["status"] != "OK":
+            return None
+
+        # First postal_code component; with result_type=postal_code that's the first result's
+        return next((
+            component["long_name"]
+            for result in data["results"]
+            for component in result["address_components"]
+            if "postal_code" in component["types"]
+        ), None)
+    except (requests.RequestException, KeyError, TypeError, ValueError) as e:
         print(f"  Error calling Google Maps API: {e}")
         return None
 
+def lookup_tract(center):
+    """(has_coordinates, zip_code) for a tract's TIGER center point"""
+    if center is None:
+        return False, None
+    return True, get_zip_from_google(*center)
+
 def main():
     print("\n" + "="*70)
     print("GOOGLE MAPS ZIP CODE MAPPER")
@@ -94,63 +123,58 @@ def main():
 
     all_tracts = []
 
-    # Fetch tracts for each county
-    for county_fips, county_name in COUNTIES.items():
-        print(f"  Fetching {county_name} County (FIPS {county_fips})...", end=" ")
-
-        params = {
-            "get": "NAME",
-            "for": "tract:*",
-            "in": f"state:18 county:{county_fips}"
-        }
-
-        try:
-            r = requests.get(ACS_BASE, params=params, timeout=30)
-            data = r.json()
-
-            county_tracts = []
-            for row in data[1:]:  # Skip header
-                tract = row[-1]  # Last column is tract code
-                geoid = f"18{county_fips}{tract}"
-                county_tracts.append((county_fips, tract, geoid, county_name))
-
-            all_tracts.extend(county_tracts)
-            print(f"✓ {len(county_tracts)} tracts")
-        except Exception as e:
-            print(f"✗ Error: {e}")
+    # Tract lists (ACS) and center points (TIGERweb) for all counties at once
+    with lookup_pool(len(COUNTIES)) as pool:
+        tract_futures = {county_fips: pool.submit(get_county_tracts, county_fips) for county_fips in COUNTIES}
+        center_futures = [pool.submit(get_tract_centers, county_fips, SESSION, api_cache) for county_fips in COUNTIES]
+
+        # Report in county order, not completion order
+        for county_fips, county_name in COUNTIES.items():
+            print(f"  Fetching {county_name} County (FIPS {county_fips})...", end=" ")
+            try:
+                county_tracts = [
+                    (county_fips, tract, f"18{county_fips}{tract}", county_name)
+                    for tract in tract_futures[county_fips].result()
+                ]
+                all_tracts.extend(county_tracts)
+                print(f"✓ {len(county_tracts)} tracts")
+            except (requests.RequestException, KeyError, TypeError, ValueError) as e:
+                print(f"✗ Error: {e}")
+
+        centers = {}
+        for future in center_futures:
+            centers.update(future.result())
 
     print(f"\n📊 Total: {len(all_tracts)} census tracts across {len(COUNTIES)} counties")
     print(f"💰 Estimated cost: ${len(all_tracts) * 0.005:.2f}")
-    print("\nStarting ZIP code lookup (this will take a few minutes)...\n")
+    print("\nStarting ZIP code lookup...\n")
 
     mapping = {}  # { county_fips: { tract: zip } }
-    errors = []
-
-    for i, (county_fips, tract, geoid, county_name) in enumerate(all_tracts, 1):
-        print(f"[{i}/{len(all_tracts)}] {county_name} tract {tract}...", end=" ")
-
-        # Get tract center coordinates
-        lat, lng = get_tract_center(geoid)
-
-        if lat is None or lng is None:
-            print(f"✗ No coordinates")
-            errors.append(f"{county_name}-{tract}")
-            continue
-
-        # Call Google Maps
-        zip_code = get_zip_from_google(lat, lng)
-
-        if zip_code:
-            if county_fips not in mapping:
-                mapping[county_fips] = {}
-            mapping[county_fips][tract] = zip_code
-            print(f"✓ {zip_code}")
-        else:
-            errors.append(f"{county_name}-{tract}")
-            print(f"✗ No ZIP found")
-
-        # Rate limiting - be nice to Google's API
-        time.sleep(0.2)  # 5 requests per second max
+    failed = []  # indexes into all_tracts
+
+    # Fan out across tracts; google_limiter replaces the fixed sleep and results print in completion order
+    with lookup_pool(MAX_WORKERS) as pool:
+        futures = {pool.submit(lookup_tract, centers.get(geoid)): idx for idx, (_, _, geoid, _) in enumerate(all_tracts)}
+        for i, future in enumerate(as_completed(futures), 1):
+            idx = futures[future]
+            county_fips, tract, geoid, county_name = all_tracts[idx]
+            has_coords, zip_code = future.result()
+            prefix = f"[{i}/{len(all_tracts)}] {county_name} tract {tract}..."
+
+            if not has_coords:
+                print(f"{prefix} ✗ No coordinates")
+                failed.append(idx)
+            elif zip_code:
+                if county_fips not in mapping:
+                    mapping[county_fips] = {}
+                mapping[county_fips][tract] = zip_code
+                print(f"{prefix} ✓ {zip_code}")
+            else:
+                failed.append(idx)
+                print(f"{prefix} ✗ No ZIP found")
+
+    # Report failures in tract order, not completion order
+    errors = [f"{all_tracts[idx][3]}-{all_tracts[idx][1]}" for idx in sorted(failed)]
 
     # Generate Python code
     print("\n" + "="*70)
@@ -159,25 +183,19 @@ def main():
     print()
     print("# Google Maps ZIP code mapping (generated " + time.strftime("%Y-%m-%d") + ")")
     print("# Maps census tracts to accurate ZIP codes for listings lookups")
-    print("TRACT_TO_ZIP_MAPPING = {")
 
+    # Several hundred lines: build the dict literal and write it in one go
+    lines = ["TRACT_TO_ZIP_MAPPING = {"]
     for county_fips in sorted(mapping.keys()):
         county_name = COUNTIES.get(county_fips, county_fips)
-        print(f"    # {county_name} County (FIPS {county_fips})")
-        print(f'    "{county_fips}": {{')
+        lines.append(f"    # {county_name} County (FIPS {county_fips})")
+        lines.append(f'    "{county_fips}": {{')
         for tract in sorted(mapping[county_fips].keys(), key=lambda x: int(x)):
             zip_code = mapping[county_fips][tract]
-            print(f'        "{tract}": "{zip_code}",')
-        print("    },")
-
-    print("}")
-    print()
-    print("# Updated function to use the mapping:")
-    print("def get_zip_for_tract(county_fips: str, tract: str) -> Optional[str]:")
-    print('    """Map census tracts to ZIP codes using Google Maps data"""')
-    print("    t = (tract or '').zfill(6)")
-    print("    county_map = TRACT_TO_ZIP_MAPPING.get(county_fips, {})")
-    print("    return county_map.get(t)")
+            lines.append(f'        "{tract}": "{zip_code}",')
+        lines.append("    },")
+    lines.append("}")
+    print("\n".join(lines))
     print()
 
     if errors:
@@ -192,10 +210,10 @@ def main():
     print(f"💰 Actual cost: ${len(all_tracts) * 0.005:.2f}")
     print("\n🔧 Next steps:")
     print("1. Copy the TRACT_TO_ZIP_MAPPING dictionary above")
-    print("2. Paste it into api/function_app.py (after GOOGLE_MAPS_NEIGHBORHOODS)")
-    print("3. Replace the get_zip_for_tract() function with the new version")
-    print("4. Test with http://localhost:5001 to verify listings are accurate")
-    print("5. Delete this script!")
+    print("2. Paste it into api/function_app.py (replacing the existing TRACT_TO_ZIP_MAPPING)")
+    print("   Leave get_zip_for_tract() alone: it reads the packed lookup built from the dict at import")
+    print("3. Test with http://localhost:5001 to verify listings are accurate")
+    print("4. Delete this script!")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,68 @@
+"""
+On-disk cache of API responses shared by the mapper scripts.
+
+Re-running a script only pays for the calls that haven't succeeded before. Entries never
+expire; delete the file (or run the script with --no-cache) to fetch everything fresh.
+Any SQLite/OS error turns the cache off and the scripts just call the APIs.
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import closing
+
+try:
+    import orjson
+    json_loads = orjson.loads  # also used by the scripts to parse API responses
+except ImportError:  # stdlib fallback so the scripts run without orjson
+    json_loads = json.loads
+
+CACHE_PATH = os.environ.get("API_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".api_cache.sqlite3"))
+
+class ApiCache:
+    """Thread-safe key -> JSON value store in a single SQLite table"""
+
+    def __init__(self, path=CACHE_PATH, enabled=True):
+        self.path = path
+        self._disabled = not (enabled and path)
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        if not self._ready:
+            with conn:
+                conn.execute("CREATE TABLE IF NOT EXISTS api_cache (key TEXT PRIMARY KEY, value TEXT)")
+            self._ready = True
+        return conn
+
+    def _disable(self, e):
+        print(f"  ⚠️  API cache {self.path} disabled: {e}")
+        self._disabled = True
+
+    def get(self, key):
+        """Cached value for key, or None"""
+        if self._disabled:
+            return None
+        try:
+            with self._lock, closing(self._connect()) as conn:
+                row = conn.execute("SELECT value FROM api_cache WHERE key = ?", (key,)).fetchone()
+        except (sqlite3.Error, OSError) as e:
+            self._disable(e)
+            return None
+        return json_loads(row[0]) if row else None
+
+    def set(self, key, value):
+        if self._disabled:
+            return
+        try:
+            with self._lock, closing(self._connect()) as conn, conn:
+                conn.execute("INSERT OR REPLACE INTO api_cache VALUES (?, ?)", (key, json.dumps(value)))
+        except (sqlite3.Error, OSError) as e:
+            self._disable(e)
+
+def open_api_cache():
+    """The scripts' cache, unless --no-cache was passed on the command line"""
+    return ApiCache(enabled="--no-cache" not in sys.argv[1:])
@@ -0,0 +1,32 @@
+"""
+HTTP plumbing shared by the mapper scripts: a pooled, retrying Session and the
+worker pool the scripts fan their API lookups out on.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+def make_session():
+    """Keep-alive Session for every request a script makes; transient 429/5xx responses are retried with backoff"""
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(
+        pool_connections=32, pool_maxsize=32,
+        max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504], raise_on_status=False),
+    ))
+    return session
+
+@contextmanager
+def lookup_pool(max_workers):
+    """
+    Thread pool for API lookups. On exit (including Ctrl+C) queued lookups are cancelled
+    instead of being paid for; finished ones are already in the api_cache.
+    """
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        yield pool
+    finally:
+        pool.shutdown(cancel_futures=True)
@@ -0,0 +1,29 @@
+"""
+Token-bucket rate limiter shared by the mapper scripts.
+
+Import it from a script in this folder (python3 scripts/<script>.py puts the folder on sys.path).
+"""
+
+import threading
+import time
+
+class RateLimiter:
+    """Thread-safe token bucket: acquire() only blocks once the burst allowance is used up"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst or rate)
+        self.tokens = self.burst
+        self.last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+            # Take the token now; a negative balance is how long this caller has to wait for it
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
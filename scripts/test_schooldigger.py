@@ -13,15 +13,17 @@ RAPIDAPI_HOST = "schooldigger-k-12-school-data-api.p.rapidapi.com"
 def test_api():
     url = "https://schooldigger-k-12-school-data-api.p.rapidapi.com/v2.0/schools"
 
-    headers = {
+    # One session for both calls: the second reuses the first one's TLS connection
+    session = requests.Session()
+    session.headers.update({
         "x-rapidapi-key": RAPIDAPI_KEY,
         "x-rapidapi-host": RAPIDAPI_HOST
-    }
+    })
 
     # Test 1: Just state
     print("TEST 1: Just state parameter")
     params = {"st": "IN", "perPage": 5}
-    r = requests.get(url, headers=headers, params=params, timeout=15)
+    r = session.get(url, params=params, timeout=15)
     print(f"Status: {r.status_code}")
     if r.status_code == 200:
         data = r.json()
@@ -35,7 +37,7 @@ def test_api():
     # Test 2: State + ZIP
     print("TEST 2: State + ZIP parameter")
     params = {"st": "IN", "zip": "46220", "perPage": 5}
-    r = requests.get(url, headers=headers, params=params, timeout=15)
+    r = session.get(url, params=params, timeout=15)
     print(f"Status: {r.status_code}")
     if r.status_code == 200:
         data = r.json()
@@ -0,0 +1,53 @@
+"""
+Census tract center points from TIGERweb, shared by the Google Maps mapper scripts.
+
+One query per county returns every tract's internal point (INTPTLAT/INTPTLON). Results
+are kept in the api_cache under tiger_county:<state+county>, so scripts 01 and 06 share them.
+"""
+
+import requests
+
+from api_cache import json_loads
+
+# TIGERweb tract layer (ACS 2023 vintage)
+TIGER_TRACTS_URL = "https://tigerweb.geo.census.gov/arcgis/rest/services/TIGERweb/tigerWMS_ACS2023/MapServer/8/query"
+
+def get_tract_centers(county_fips, session, cache):
+    """Internal points for every tract in an Indiana county: {geoid: (lat, lng)}, from one TIGERweb query"""
+    cache_key = f"tiger_county:18{county_fips}"
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return {geoid: tuple(center) for geoid, center in cached.items()}
+
+    centers = {}
+    params = {
+        "where": f"STATE='18' AND COUNTY='{county_fips}'",
+        "outFields": "GEOID,INTPTLAT,INTPTLON",
+        "returnGeometry": "false",
+        "resultOffset": 0,
+        "f": "json"
+    }
+    try:
+        # Page through in case the layer caps the record count below the county's tract count
+        while True:
+            r = session.get(TIGER_TRACTS_URL, params=params, timeout=30)
+            r.raise_for_status()
+            data = json_loads(r.content)
+            if "error" in data:
+                # ArcGIS reports query errors in a 200 response
+                raise ValueError(f"TIGERweb error: {data['error']}")
+            features = data.get("features") or []
+            for feature in features:
+                attrs = feature["attributes"]
+                centers[attrs["GEOID"]] = float(attrs["INTPTLAT"]), float(attrs["INTPTLON"])
+            if not (data.get("exceededTransferLimit") and features):
+                break
+            params["resultOffset"] += len(features)
+    except (requests.RequestException, KeyError, TypeError, ValueError) as e:
+        print(f"  TIGER tract lookup failed for county {county_fips}: {e}")
+        return centers
+
+    # An empty answer is never cached, so a bad response doesn't stick for the county
+    if centers:
+        cache.set(cache_key, centers)
+    return centers